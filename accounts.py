@@ -0,0 +1,212 @@
+"""Run several accounts side by side, one worker process per account, and merge their results.
+
+Each account runs in its own working directory under ACCOUNTS_DIR. That directory holds the
+account's browser profile, log file, session cache, checkpoint and report.
+
+Usage: python main.py --accounts accounts.json [SYMBOL ...]
+"""
+import json
+import multiprocessing
+import os
+import re
+import time
+from datetime import datetime
+from config import (ACCOUNTS_FILE, ACCOUNTS_DIR, ACCOUNT_MAX_WORKERS, ACCOUNT_BROWSER_MEMORY, CHART_WORKERS,
+                    DRIVER_MANIFEST_FILE, REPORT_DIR)
+from logger import get_logger
+from report_writer import ReportWriter, read_records
+
+logger = get_logger(__name__)
+
+# Profile steps reported per account
+TIMED_STEPS = ('login.setup_driver', 'login.login', 'login.restore_session', 'portfolio.navigate_to_portfolio',
+               'portfolio.get_stock_positions', 'main.analyze_symbol')
+
+
+def load_accounts(path=ACCOUNTS_FILE):
+    """Accounts from a JSON list; a password may be given directly or as the name of an environment variable."""
+    with open(path) as f:
+        entries = json.load(f)
+    accounts = []
+    names = set()
+    for entry in entries:
+        name = re.sub(r'[^A-Za-z0-9_.-]', '_', str(entry.get('name') or entry.get('phone_number') or ''))
+        if not name or name in names:
+            raise ValueError(f"Account names in {path} must be present and unique: {entry.get('name')!r}")
+        password = entry.get('password') or os.environ.get(entry.get('password_env') or '')
+        if not entry.get('phone_number') or not password:
+            raise ValueError(f"Account {name} in {path} needs a phone_number and a password or password_env")
+        names.add(name)
+        accounts.append({'name': name, 'phone_number': str(entry['phone_number']), 'password': password,
+                         'symbols': entry.get('symbols')})
+    return accounts
+
+
+def available_memory():
+    """Bytes of memory available to new processes, or None if it cannot be determined."""
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def worker_limit(accounts, max_workers=ACCOUNT_MAX_WORKERS):
+    """Accounts to run at once: at most one per CPU per browser, within available memory and `max_workers`."""
+    browsers = max(1, CHART_WORKERS)
+    limits = {'accounts': accounts, 'configured': max_workers or accounts,
+              'cpu': max(1, (os.cpu_count() or 1) // browsers)}
+    memory = available_memory()
+    if memory is not None:
+        limits['memory'] = max(1, memory // (ACCOUNT_BROWSER_MEMORY * browsers))
+    limit = min(limits.values())
+    logger.info("Running %s accounts at once (limits: %s)", limit, limits)
+    return limit
+
+
+def run_account(account, root, symbols=None, driver_manifest=None):
+    """Worker process: analyze one account inside its own working directory; returns its outcome."""
+    workdir = os.path.join(root, account['name'])
+    os.makedirs(workdir, exist_ok=True)
+    # Relative paths in config (log file, session cache, checkpoint, reports) now resolve to the account's directory
+    os.chdir(workdir)
+    from drivers import DriverManifest
+    from login import KotakLogin
+    from main import KotakSecuritiesAnalyzer
+    from profiler import profiler
+
+    started = time.perf_counter()
+    login = KotakLogin(phone_number=account['phone_number'], password=account['password'],
+                       profile_dir='browser_profile')
+    if driver_manifest:
+        login.driver_manifest = DriverManifest(driver_manifest)
+    analyzer = KotakSecuritiesAnalyzer(login=login)
+    outcome = {'account': account['name'], 'workdir': workdir, 'error': None, 'report': None,
+               'positions': [], 'totals': None}
+    try:
+        analyzer.run(symbols=account.get('symbols') or symbols)
+    except Exception as e:
+        outcome['error'] = str(e)
+    outcome['elapsed_s'] = round(time.perf_counter() - started, 3)
+    if analyzer.report:
+        outcome['report'] = os.path.abspath(analyzer.report.path)
+    if analyzer.portfolio_analyzer:
+        outcome['positions'] = [position.to_dict() for position in analyzer.portfolio_analyzer.positions]
+        outcome['totals'] = analyzer.portfolio_analyzer.book.frame().totals()
+    profile = profiler.profile()
+    outcome['timings'] = {
+        'wall_s': profile['wall_s'],
+        'time': profile['time'],
+        'steps': {name: {'calls': step['calls'], 'total_s': step['total_s']}
+                  for name, step in profile['steps'].items() if name in TIMED_STEPS}
+    }
+    return outcome
+
+
+def _failed(account, root, error):
+    return {'account': account['name'], 'workdir': os.path.join(root, account['name']), 'error': error,
+            'report': None, 'positions': [], 'totals': None, 'elapsed_s': None, 'timings': None}
+
+
+def _run_job(job):
+    account, root = job[:2]
+    try:
+        return run_account(*job)
+    except Exception as e:
+        return _failed(account, root, f"worker process failed: {str(e)}")
+
+
+class AccountRunner:
+    def __init__(self, accounts, root=ACCOUNTS_DIR, workers=None):
+        self.accounts = accounts
+        self.root = os.path.abspath(root)
+        self.workers = workers
+        self.logger = logger
+
+    def run(self, symbols=None):
+        """Analyze every account, then write the merged report and summary; returns the summary."""
+        workers = self.workers or worker_limit(len(self.accounts))
+        manifest = os.path.abspath(DRIVER_MANIFEST_FILE)
+        outcomes = []
+        started = time.perf_counter()
+        jobs = [(account, self.root, symbols, manifest) for account in self.accounts]
+        # Spawned, single-use workers: every account gets a fresh process, so logging, the profiler
+        # and the working directory start clean
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(workers, maxtasksperchild=1) as pool:
+            for outcome in pool.imap_unordered(_run_job, jobs):
+                if outcome['error']:
+                    self.logger.error("Account %s failed: %s", outcome['account'], outcome['error'])
+                else:
+                    self.logger.info("Account %s finished in %.1fs", outcome['account'], outcome['elapsed_s'])
+                outcomes.append(outcome)
+            # Leaving the block terminates the pool; let the workers exit and flush their logs first
+            pool.close()
+            pool.join()
+        outcomes.sort(key=lambda outcome: outcome['account'])
+        return self.merge(outcomes, round(time.perf_counter() - started, 3))
+
+    def merge(self, outcomes, elapsed):
+        """One NDJSON report with every account's results, and a JSON summary of positions and timings."""
+        report = ReportWriter()
+        try:
+            for outcome in outcomes:
+                if outcome['report'] and os.path.exists(outcome['report']):
+                    for record in read_records(outcome['report']):
+                        report.write(dict(record, account=outcome['account']))
+        finally:
+            report.close()
+
+        holdings = {}
+        for outcome in outcomes:
+            for position in outcome['positions']:
+                holding = holdings.setdefault(position['symbol'].upper(),
+                                              {'quantity': 0, 'market_value': 0.0, 'accounts': []})
+                holding['quantity'] += position['quantity'] or 0
+                holding['market_value'] = round(holding['market_value'] + (position['quantity'] or 0)
+                                                * (position['current_price'] or 0), 2)
+                holding['accounts'].append(outcome['account'])
+        totals = [outcome['totals'] for outcome in outcomes if outcome['totals']]
+        summary = {
+            'report': report.path,
+            'elapsed_s': elapsed,
+            'totals': {
+                'accounts': len(outcomes),
+                'failed': sum(1 for outcome in outcomes if outcome['error']),
+                'positions': sum(total['positions'] for total in totals),
+                'market_value': round(sum(total['market_value'] for total in totals), 2),
+                'pnl': round(sum(total['pnl'] for total in totals), 2)
+            },
+            'holdings': dict(sorted(holdings.items())),
+            'accounts': outcomes
+        }
+        path = os.path.join(REPORT_DIR, f"accounts_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, 'w') as f:
+            json.dump(summary, f, indent=2, default=str)
+        self.logger.info("Merged %s results from %d accounts into %s; summary in %s", report.count, len(outcomes),
+                         report.path, path)
+        self.print_timings(summary)
+        return summary
+
+    def print_timings(self, summary):
+        """Per-account time breakdown, slowest first."""
+        print("\n" + "=" * 60)
+        print(f"ACCOUNTS ({summary['elapsed_s']:.1f}s total)")
+        print("=" * 60)
+        for outcome in sorted(summary['accounts'], key=lambda outcome: -(outcome['elapsed_s'] or 0)):
+            status = f"FAILED: {outcome['error']}" if outcome['error'] else f"{len(outcome['positions'])} positions"
+            print(f"\n{outcome['account']}: {outcome['elapsed_s'] or 0:.1f}s, {status}")
+            timings = outcome['timings'] or {}
+            for label, value in timings.get('time', {}).items():
+                print(f"  {label}: {value:.2f}")
+            for name, step in sorted(timings.get('steps', {}).items(), key=lambda item: -item[1]['total_s']):
+                print(f"  {name}: {step['calls']} calls, {step['total_s']:.2f}s")
+        print("=" * 60)
@@ -0,0 +1,135 @@
+"""End-to-end throughput and per-stage latency against a local mock of the trading site.
+
+Drives the real KotakLogin, PortfolioAnalyzer and ChartAnalyzer in a browser (BROWSER in config.py).
+
+Usage: python benchmarks/bench_end_to_end.py [--positions 20] [--symbols 10] [--latency-ms 30] [--headed]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_site import build_mock_site, point_config_at
+from candle_store import CandleStore
+from chart_analyzer import ChartAnalyzer
+from login import KotakLogin
+from portfolio import PortfolioAnalyzer
+from profiler import profiler
+from screenshots import ScreenshotPipeline
+from session_cache import SessionCache
+from stub_server import StubServer
+
+STAGES = ('login.setup_driver', 'login.login', 'portfolio.navigate_to_portfolio', 'portfolio.get_stock_positions',
+          'chart.open_chart', 'chart.set_timeframe', 'chart.analyze_current_movement', 'chart.take_screenshot',
+          'chart.close_chart')
+
+
+def stage_latencies(spans):
+    """Mean, p50, p95 and max seconds per stage from the profiler's spans."""
+    durations = {}
+    for span in spans:
+        durations.setdefault(span['name'], []).append(span['duration_s'])
+    table = {}
+    for name in STAGES:
+        values = sorted(durations.get(name, []))
+        if not values:
+            continue
+        table[name] = {
+            'calls': len(values),
+            'mean_s': round(statistics.fmean(values), 4),
+            'p50_s': round(values[len(values) // 2], 4),
+            'p95_s': round(values[min(len(values) - 1, int(len(values) * 0.95))], 4),
+            'max_s': round(values[-1], 4)
+        }
+    return table
+
+
+def run(args, root):
+    server = StubServer(root, port=args.port, latency=args.latency_ms / 1000).start()
+    profiler.reset()
+    login = KotakLogin()
+    # Keep the mock's session away from the real session cache
+    login.session_cache = SessionCache(os.path.join(root, 'session.json'))
+    screenshots = ScreenshotPipeline(directory=os.path.join(root, 'screenshots'))
+    analyzed = 0
+    try:
+        start = time.perf_counter()
+        driver = login.setup_driver()
+        login.login()
+        portfolio = PortfolioAnalyzer(driver)
+        portfolio.navigate_to_portfolio()
+        positions = portfolio.get_stock_positions()
+        ready = time.perf_counter()
+
+        chart = ChartAnalyzer(driver, store=CandleStore(os.path.join(root, 'candles')), screenshots=screenshots,
+                              row_index=portfolio.row_index)
+        for position in positions[:args.symbols]:
+            chart.waits.drain()
+            chart.open_chart(position.symbol)
+            chart.set_timeframe('1H')
+            chart.analyze_current_movement()
+            chart.take_screenshot(f"chart_{position.symbol}.png")
+            chart.close_chart()
+            analyzed += 1
+        finished = time.perf_counter()
+    finally:
+        screenshots.close()
+        login.close()
+        server.stop()
+
+    profile = profiler.profile()
+    charts = finished - ready
+    return {
+        'positions': len(positions),
+        'symbols_analyzed': analyzed,
+        'latency_ms': args.latency_ms,
+        'startup_s': round(ready - start, 3),
+        'charts_s': round(charts, 3),
+        'total_s': round(finished - start, 3),
+        'symbols_per_minute': round(analyzed / charts * 60, 2) if charts else None,
+        'end_to_end_symbols_per_minute': round(analyzed / (finished - start) * 60, 2),
+        'time': profile['time'],
+        'stages': stage_latencies(profile['spans']),
+        'driver_commands': sum(stats['count'] for stats in profile['commands'].values())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--positions', type=int, default=20, help='holdings in the mock portfolio')
+    parser.add_argument('--symbols', type=int, default=10, help='charts to analyze')
+    parser.add_argument('--bars', type=int, default=200, help='candles per symbol')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='delay the mock adds to every response')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--headed', action='store_true', help='show the browser window')
+    parser.add_argument('--json', action='store_true', help='print the raw result')
+    args = parser.parse_args()
+
+    point_config_at(f"http://127.0.0.1:{args.port}")
+    if not args.headed:
+        os.environ['KOTAK_HEADLESS'] = '1'
+    with tempfile.TemporaryDirectory(prefix='kotak_mock_') as root:
+        build_mock_site(root, positions=args.positions, bars=args.bars)
+        result = run(args, root)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{result['symbols_analyzed']} of {result['positions']} symbols, {args.latency_ms:.0f} ms mock latency")
+    print(f"  startup (driver, login, holdings): {result['startup_s']:.2f} s")
+    print(f"  charts: {result['charts_s']:.2f} s -> {result['symbols_per_minute']} symbols/min "
+          f"({result['end_to_end_symbols_per_minute']} end to end)")
+    print(f"  driver commands: {result['driver_commands']}")
+    print(f"  {'stage':34} {'calls':>5} {'mean s':>8} {'p50 s':>8} {'p95 s':>8} {'max s':>8}")
+    for name, stage in result['stages'].items():
+        print(f"  {name:34} {stage['calls']:>5} {stage['mean_s']:>8.3f} {stage['p50_s']:>8.3f} "
+              f"{stage['p95_s']:>8.3f} {stage['max_s']:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Driver commands and time for per-row vs bulk holdings extraction.
+
+Usage: python benchmarks/bench_holdings.py [--latency-ms 2]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium.webdriver.common.by import By
+from portfolio import PortfolioAnalyzer
+from benchmarks.fake_driver import FakeHoldingsDriver, synthetic_holdings
+
+
+def per_row(analyzer):
+    """The original extraction: individual element lookups for every row."""
+    rows = analyzer.driver.find_elements(By.CLASS_NAME, 'holding-row')
+    return [analyzer._extract_row(row) for row in rows]
+
+
+def bulk(analyzer):
+    return analyzer.get_stock_positions()
+
+
+def measure(extract, size, latency):
+    driver = FakeHoldingsDriver(synthetic_holdings(size), latency=latency)
+    analyzer = PortfolioAnalyzer(driver)
+    start = time.perf_counter()
+    positions = extract(analyzer)
+    elapsed = time.perf_counter() - start
+    assert len(positions) == size
+    return sum(driver.commands.values()), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency-ms', type=float, default=1.0, help='simulated round-trip latency per command')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    latency = args.latency_ms / 1000
+    print(f"{'rows':>6} {'path':>8} {'commands':>9} {'seconds':>9}")
+    for size in args.sizes:
+        for name, extract in (('per-row', per_row), ('bulk', bulk)):
+            commands, elapsed = measure(extract, size, latency)
+            print(f"{size:>6} {name:>8} {commands:>9} {elapsed:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
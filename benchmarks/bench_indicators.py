@@ -0,0 +1,119 @@
+"""Vectorized indicators vs a per-candle Python loop on synthetic hourly bars.
+
+Usage: python benchmarks/bench_indicators.py [--symbols 2000] [--bars 3500] [--loop-symbols 20]
+
+The loop reference runs on a subset of symbols (it is far too slow for the full
+batch), is checked against the vectorized output, and is extrapolated per symbol.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import indicators
+from config import SMA_WINDOWS, ATR_WINDOW, SWING_ORDER, PRICE_CHANGE_THRESHOLD, VOLUME_THRESHOLD
+
+
+def synthetic_bars(symbols, bars, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.006, (symbols, bars)), axis=-1))
+    spread = np.abs(rng.normal(0, 0.004, (symbols, bars))) * close
+    high = close + spread
+    low = close - spread
+    volume = rng.integers(100_000, 3_000_000, (symbols, bars)).astype(np.float64)
+    return high, low, close, volume
+
+
+def loop_reference(high, low, close, volume):
+    """The same indicators for one symbol, one candle at a time."""
+    n = len(close)
+    result = {}
+    for window in SMA_WINDOWS:
+        values = [math.nan] * n
+        for i in range(window - 1, n):
+            values[i] = sum(close[i - window + 1:i + 1]) / window
+        result[f"sma_{window}"] = values
+    true_ranges = []
+    for i in range(n):
+        if i == 0:
+            true_ranges.append(high[i] - low[i])
+        else:
+            true_ranges.append(max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1])))
+    atr = [math.nan] * n
+    for i in range(ATR_WINDOW - 1, n):
+        atr[i] = sum(true_ranges[i - ATR_WINDOW + 1:i + 1]) / ATR_WINDOW
+    result['atr'] = atr
+    swing_highs, swing_lows = [], []
+    for i in range(SWING_ORDER, n - SWING_ORDER):
+        window_high = high[i - SWING_ORDER:i + SWING_ORDER + 1]
+        window_low = low[i - SWING_ORDER:i + SWING_ORDER + 1]
+        if high[i] == max(window_high):
+            swing_highs.append(i)
+        if low[i] == min(window_low):
+            swing_lows.append(i)
+    last_close = close[-1]
+    result['resistance'] = sorted(high[i] for i in swing_highs if high[i] > last_close)[:3]
+    result['support'] = sorted((low[i] for i in swing_lows if low[i] < last_close), reverse=True)[:3]
+    trend = 'NEUTRAL'
+    if len(swing_highs) >= 2 and len(swing_lows) >= 2:
+        highs_delta = high[swing_highs[-1]] - high[swing_highs[-2]]
+        lows_delta = low[swing_lows[-1]] - low[swing_lows[-2]]
+        if highs_delta > 0 and lows_delta > 0:
+            trend = 'UPTREND'
+        elif highs_delta < 0 and lows_delta < 0:
+            trend = 'DOWNTREND'
+    result['trend'] = trend
+    breaches = 0
+    for i in range(1, n):
+        if abs((close[i] / close[i - 1] - 1) * 100) >= PRICE_CHANGE_THRESHOLD:
+            breaches += 1
+    result['price_breaches'] = breaches
+    result['volume_breaches'] = sum(1 for v in volume if v >= VOLUME_THRESHOLD)
+    return result
+
+
+def check(vectorized, reference, row):
+    for window in SMA_WINDOWS:
+        key = f"sma_{window}"
+        assert np.allclose(vectorized[key][row], reference[key], equal_nan=True), key
+    assert np.allclose(vectorized['atr'][row], reference['atr'], equal_nan=True), 'atr'
+    for key in ('support', 'resistance'):
+        levels = vectorized[key][row]
+        assert np.allclose(levels[~np.isnan(levels)], reference[key]), key
+    assert vectorized['trend'][row] == reference['trend'], 'trend'
+    assert vectorized['price_breach'][row].sum() == reference['price_breaches'], 'price breaches'
+    assert vectorized['volume_breach'][row].sum() == reference['volume_breaches'], 'volume breaches'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--bars', type=int, default=3500, help='about two years of hourly bars')
+    parser.add_argument('--loop-symbols', type=int, default=20)
+    args = parser.parse_args()
+
+    high, low, close, volume = synthetic_bars(args.symbols, args.bars)
+
+    start = time.perf_counter()
+    vectorized = indicators.compute(high, low, close, volume)
+    vectorized_seconds = time.perf_counter() - start
+
+    loop_symbols = min(args.loop_symbols, args.symbols)
+    start = time.perf_counter()
+    for row in range(loop_symbols):
+        reference = loop_reference(high[row].tolist(), low[row].tolist(), close[row].tolist(), volume[row].tolist())
+        check(vectorized, reference, row)
+    loop_seconds = (time.perf_counter() - start) / loop_symbols * args.symbols
+
+    print(f"{args.symbols} symbols x {args.bars} bars")
+    print(f"  vectorized: {vectorized_seconds:8.2f}s")
+    print(f"  loop:       {loop_seconds:8.2f}s (extrapolated from {loop_symbols} symbols, outputs match)")
+    print(f"  speedup:    {loop_seconds / vectorized_seconds:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
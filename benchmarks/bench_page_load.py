@@ -0,0 +1,131 @@
+"""Page-load time, bytes fetched and browser memory, normal vs lean mode, against the local mock site.
+
+The mock pages carry a render-blocking tracker, a web font and images (--assets), like a real site.
+Needs a browser (BROWSER in config.py); process memory also needs psutil.
+
+Usage: python benchmarks/bench_page_load.py [--runs 5] [--assets 8] [--latency-ms 30] [--no-screenshots]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium.webdriver.support.ui import WebDriverWait
+from benchmarks.mock_site import build_mock_site, point_config_at
+import config
+from login import KotakLogin
+from session_cache import SessionCache
+from stub_server import StubServer
+
+try:
+    import psutil
+except ImportError:  # memory is then reported from the JS heap only
+    psutil = None
+
+PAGE_METRICS_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0] || {};
+var resources = performance.getEntriesByType('resource');
+var bytes = 0;
+for (var i = 0; i < resources.length; i++) { bytes += resources[i].transferSize || 0; }
+return {
+    dom_content_loaded_ms: nav.domContentLoadedEventEnd || null,
+    load_ms: nav.loadEventEnd || null,
+    resources: resources.length,
+    bytes: bytes,
+    js_heap_bytes: performance.memory ? performance.memory.usedJSHeapSize : null
+};
+"""
+
+
+def browser_rss(driver):
+    """Resident memory of the driver's browser process tree, or None."""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        return sum(process.memory_info().rss for process in [root] + root.children(recursive=True))
+    except (AttributeError, psutil.Error):
+        return None
+
+
+def load(driver, url, ready_script):
+    """Seconds until driver.get returns and until the page's data is readable, plus page metrics."""
+    start = time.perf_counter()
+    driver.get(url)
+    returned = time.perf_counter()
+    WebDriverWait(driver, 30, poll_frequency=0.05).until(lambda d: d.execute_script(ready_script))
+    ready = time.perf_counter()
+    metrics = driver.execute_script(PAGE_METRICS_SCRIPT)
+    metrics.update({'get_s': returned - start, 'ready_s': ready - start})
+    return metrics
+
+
+def measure(lean, keep_chart_assets, runs, root, positions):
+    login = KotakLogin(lean=lean, keep_chart_assets=keep_chart_assets)
+    login.session_cache = SessionCache(os.path.join(root, 'session.json'))
+    driver = login.setup_driver()
+    pages = {
+        'login': (config.KOTAK_LOGIN_URL, "return document.getElementsByName('uid').length > 0;"),
+        'holdings': (config.KOTAK_PORTFOLIO_URL,
+                     f"return document.getElementsByClassName('holding-row').length >= {positions};")
+    }
+    results = {name: [] for name in pages}
+    try:
+        for _ in range(runs):
+            for name, (url, ready_script) in pages.items():
+                results[name].append(load(driver, url, ready_script))
+        rss = browser_rss(driver)
+    finally:
+        login.close()
+    return results, rss
+
+
+def summarize(samples, key):
+    values = [sample[key] for sample in samples if sample.get(key) is not None]
+    return statistics.median(values) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='loads of each page per mode')
+    parser.add_argument('--positions', type=int, default=50)
+    parser.add_argument('--assets', type=int, default=8, help='images per page on the mock site')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='delay the mock adds to every response')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--no-screenshots', action='store_true',
+                        help='lean mode without the screenshot allowlist (fonts and svg blocked too)')
+    args = parser.parse_args()
+
+    point_config_at(f"http://127.0.0.1:{args.port}")
+    os.environ['KOTAK_HEADLESS'] = '1'
+    with tempfile.TemporaryDirectory(prefix='kotak_mock_') as root:
+        build_mock_site(root, positions=args.positions, bars=50, assets=args.assets)
+        with StubServer(root, port=args.port, latency=args.latency_ms / 1000):
+            modes = {
+                'normal': measure(False, True, args.runs, root, args.positions),
+                'lean': measure(True, not args.no_screenshots, args.runs, root, args.positions)
+            }
+
+    print(f"{args.runs} loads per page, {args.assets} images per page, {args.latency_ms:.0f} ms mock latency "
+          f"(medians)")
+    print(f"  {'page':9} {'mode':7} {'get ms':>8} {'ready ms':>9} {'DCL ms':>8} {'requests':>9} {'KB':>8} "
+          f"{'JS heap MB':>11}")
+    for page in ('login', 'holdings'):
+        for mode, (results, _) in modes.items():
+            samples = results[page]
+            heap = summarize(samples, 'js_heap_bytes')
+            print(f"  {page:9} {mode:7} {summarize(samples, 'get_s') * 1000:8.0f} "
+                  f"{summarize(samples, 'ready_s') * 1000:9.0f} {summarize(samples, 'dom_content_loaded_ms') or 0:8.0f} "
+                  f"{summarize(samples, 'resources'):9.0f} {summarize(samples, 'bytes') / 1024:8.0f} "
+                  f"{heap / 2 ** 20 if heap else float('nan'):11.1f}")
+    for mode, (_, rss) in modes.items():
+        print(f"  browser memory ({mode}): {rss / 2 ** 20:.0f} MB" if rss else
+              f"  browser memory ({mode}): unavailable (install psutil)")
+
+
+if __name__ == '__main__':
+    main()
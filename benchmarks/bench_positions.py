@@ -0,0 +1,75 @@
+"""Symbol lookups and portfolio aggregates: dict scan vs indexed typed book.
+
+Usage: python benchmarks/bench_positions.py [--positions 10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from positions import Position, PositionBook, parse_number
+from benchmarks.fake_driver import synthetic_holdings
+
+
+def records(count):
+    """Display-string records as the holdings scrape produces them."""
+    return [{'symbol': row['symbol'], 'quantity': row['quantity'], 'current_price': row['current-price'],
+             'pnl': row['pnl']} for row in synthetic_holdings(count)]
+
+
+def scan_lookup(raw, symbol):
+    """The original get_position_by_symbol: a linear scan upper-casing every entry."""
+    for position in raw:
+        if position['symbol'].upper() == symbol.upper():
+            return position
+    return None
+
+
+def loop_totals(raw):
+    """Aggregates computed per position from display strings."""
+    total_value = total_pnl = 0.0
+    for position in raw:
+        value = parse_number(position['quantity']) * parse_number(position['current_price'])
+        pnl = parse_number(position['pnl'])
+        total_value += value
+        total_pnl += value - value / (1 + pnl / 100) if position['pnl'].endswith('%') else pnl
+    return total_value, total_pnl
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--positions', type=int, default=10000)
+    args = parser.parse_args()
+
+    raw = records(args.positions)
+    symbols = [record['symbol'].lower() for record in raw]
+
+    book, build_seconds = timed(lambda: PositionBook(Position.from_record(record) for record in raw))
+    _, scan_seconds = timed(lambda: [scan_lookup(raw, symbol) for symbol in symbols])
+    _, index_seconds = timed(lambda: [book.get(symbol) for symbol in symbols])
+    (loop_value, loop_pnl), loop_seconds = timed(loop_totals, raw)
+    frame, frame_build_seconds = timed(book.frame)
+    totals, frame_seconds = timed(frame.totals)
+    timed(frame.weights)
+
+    assert abs(totals['market_value'] - loop_value) < 1e-3 * max(1.0, loop_value)
+    assert abs(totals['pnl'] - loop_pnl) < 1e-3 * max(1.0, abs(loop_pnl))
+
+    print(f"{args.positions} positions")
+    print(f"  parse + index book:          {build_seconds:8.4f}s")
+    print(f"  lookup every symbol, scan:   {scan_seconds:8.4f}s")
+    print(f"  lookup every symbol, index:  {index_seconds:8.4f}s")
+    print(f"  totals, per-position loop:   {loop_seconds:8.4f}s")
+    print(f"  totals, frame:               {frame_seconds:8.4f}s (+{frame_build_seconds:.4f}s to build columns)")
+
+
+if __name__ == '__main__':
+    main()
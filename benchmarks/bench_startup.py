@@ -0,0 +1,97 @@
+"""Startup time: importing the app, starting the driver and the first driver command, in fresh interpreters.
+
+The import phase runs anywhere; --driver also starts a browser (BROWSER in config.py), first with an
+empty driver manifest (cold) and then with the manifest the cold run wrote (warm).
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--driver]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should not be loaded just by importing the app
+DEFERRED_MODULES = ('webdriver_manager', 'dotenv')
+
+
+def child(manifest, start_driver):
+    """Runs in a fresh interpreter; prints phase timings as JSON."""
+    start = time.perf_counter()
+    sys.path.insert(0, REPO_ROOT)
+    import main  # noqa: F401  (the full application import graph)
+    imported = time.perf_counter()
+    result = {
+        'import_s': imported - start,
+        'loaded': [name for name in DEFERRED_MODULES if name in sys.modules],
+        'log_file_created': os.path.exists(os.path.join(os.getcwd(), 'kotak_analyzer.log'))
+    }
+    if start_driver:
+        from drivers import DriverManifest
+        from login import KotakLogin
+        login = KotakLogin()
+        login.driver_manifest = DriverManifest(manifest)
+        try:
+            driver = login.setup_driver()
+            started = time.perf_counter()
+            driver.execute_script('return 1;')
+            first_command = time.perf_counter()
+        finally:
+            login.close()
+        result.update({'driver_start_s': started - imported, 'time_to_first_command_s': first_command - start})
+    print(json.dumps(result))
+
+
+def measure(runs, manifest, start_driver, cold):
+    samples = []
+    for _ in range(runs):
+        if cold and os.path.exists(manifest):
+            os.remove(manifest)
+        # A scratch working directory keeps log files and caches out of the checkout
+        with tempfile.TemporaryDirectory() as cwd:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', '--manifest', manifest]
+                + (['--driver'] if start_driver else []),
+                cwd=cwd, capture_output=True, text=True, check=True
+            ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return samples
+
+
+def report(label, samples):
+    print(f"{label} ({len(samples)} runs, median):")
+    for key in ('import_s', 'driver_start_s', 'time_to_first_command_s'):
+        values = [sample[key] for sample in samples if key in sample]
+        if values:
+            print(f"  {key:26} {statistics.median(values) * 1000:8.1f} ms")
+    print(f"  deferred modules loaded: {', '.join(samples[0]['loaded']) or 'none'}")
+    print(f"  log file created on import: {samples[0]['log_file_created']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--driver', action='store_true', help='also start the browser and time the first command')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--manifest', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.manifest, args.driver)
+        return
+    with tempfile.TemporaryDirectory() as scratch:
+        manifest = os.path.join(scratch, 'driver_manifest.json')
+        if args.driver:
+            report('cold (no driver manifest)', measure(args.runs, manifest, True, cold=True))
+            report('warm (cached driver manifest)', measure(args.runs, manifest, True, cold=False))
+        else:
+            report('import', measure(args.runs, manifest, False, cold=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Several timeframes per symbol: one chart open for all of them vs an open and close per timeframe.
+
+Runs against the local mock site in a browser (BROWSER in config.py) and counts WebDriver round trips,
+chart opens and closes, and time per symbol for both flows.
+
+Usage: python benchmarks/bench_timeframes.py [--symbols 3] [--timeframes 15m,1H,1D] [--latency-ms 30]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_site import build_mock_site, point_config_at
+from chart_analyzer import ChartAnalyzer
+from login import KotakLogin
+from portfolio import PortfolioAnalyzer
+from profiler import profiler
+from session_cache import SessionCache
+from stub_server import StubServer
+
+
+def open_per_timeframe(chart, symbol, timeframes):
+    """The old flow: the chart is reopened for every timeframe."""
+    for timeframe in timeframes:
+        chart.open_chart(symbol)
+        chart.set_timeframe(timeframe)
+        chart.analyze_current_movement()
+        chart.close_chart()
+
+
+def single_open(chart, symbol, timeframes):
+    chart.open_chart(symbol)
+    chart.analyze_timeframes(timeframes)
+    chart.close_chart()
+
+
+def measure(flow, chart, symbols, timeframes):
+    profiler.reset()
+    start = time.perf_counter()
+    for symbol in symbols:
+        chart.waits.drain()
+        flow(chart, symbol, timeframes)
+    elapsed = time.perf_counter() - start
+    profile = profiler.profile()
+    commands = sum(stats['count'] for stats in profile['commands'].values())
+    return {
+        'seconds_per_symbol': round(elapsed / len(symbols), 3),
+        'commands_per_symbol': round(commands / len(symbols), 1),
+        'opens': profile['steps'].get('chart.open_chart', {}).get('calls', 0),
+        'closes': profile['steps'].get('chart.close_chart', {}).get('calls', 0),
+        'wait_polling_idle_s': profile['time']['wait_polling_idle_s'],
+        'sleeping_s': profile['time']['sleeping_s']
+    }
+
+
+def run(args, root, timeframes):
+    login = KotakLogin()
+    login.session_cache = SessionCache(os.path.join(root, 'session.json'))
+    try:
+        driver = login.setup_driver()
+        login.login()
+        portfolio = PortfolioAnalyzer(driver)
+        portfolio.navigate_to_portfolio()
+        symbols = [position.symbol for position in portfolio.get_stock_positions()[:args.symbols]]
+        chart = ChartAnalyzer(driver, row_index=portfolio.row_index)
+        return {
+            'symbols': len(symbols),
+            'timeframes': timeframes,
+            'open_per_timeframe': measure(open_per_timeframe, chart, symbols, timeframes),
+            'single_open': measure(single_open, chart, symbols, timeframes)
+        }
+    finally:
+        login.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=3)
+    parser.add_argument('--timeframes', default='15m,1H,1D', help='comma-separated, as labelled on the mock chart')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='delay the mock adds to every response')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--json', action='store_true', help='print the raw result')
+    args = parser.parse_args()
+    timeframes = [timeframe.strip() for timeframe in args.timeframes.split(',') if timeframe.strip()]
+
+    point_config_at(f"http://127.0.0.1:{args.port}")
+    os.environ['KOTAK_HEADLESS'] = '1'
+    with tempfile.TemporaryDirectory(prefix='kotak_mock_') as root:
+        build_mock_site(root, positions=max(args.symbols, 5), bars=200)
+        with StubServer(root, port=args.port, latency=args.latency_ms / 1000):
+            result = run(args, root, timeframes)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    before, after = result['open_per_timeframe'], result['single_open']
+    print(f"{result['symbols']} symbols x {len(timeframes)} timeframes ({', '.join(timeframes)}), "
+          f"{args.latency_ms:.0f} ms mock latency")
+    print(f"  {'flow':20} {'s/symbol':>9} {'commands/symbol':>16} {'opens':>6} {'closes':>7} {'wait idle s':>12}")
+    for label, flow in (('open per timeframe', before), ('single open', after)):
+        print(f"  {label:20} {flow['seconds_per_symbol']:9.2f} {flow['commands_per_symbol']:16.1f} "
+              f"{flow['opens']:6} {flow['closes']:7} {flow['wait_polling_idle_s']:12.2f}")
+    print(f"  saved per symbol: {before['commands_per_symbol'] - after['commands_per_symbol']:.1f} round trips, "
+          f"{before['seconds_per_symbol'] - after['seconds_per_symbol']:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
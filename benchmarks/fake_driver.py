@@ -0,0 +1,57 @@
+"""In-memory WebDriver stand-ins that count driver commands, for benchmarks that need no browser."""
+import time
+from collections import Counter
+
+
+class FakeElement:
+    def __init__(self, driver, children=None, text=''):
+        self._driver = driver
+        self._children = children or {}
+        self._text = text
+
+    def find_element(self, by, value):
+        self._driver.command('findChildElement')
+        if value not in self._children:
+            raise LookupError(f"no element {value!r}")
+        return FakeElement(self._driver, text=self._children[value])
+
+    @property
+    def text(self):
+        self._driver.command('getElementText')
+        return self._text
+
+
+class FakeHoldingsDriver:
+    """Serves a synthetic holdings table; every call is counted as one driver round trip."""
+
+    def __init__(self, rows, latency=0.0):
+        self.rows = rows
+        self.latency = latency
+        self.commands = Counter()
+
+    def command(self, name):
+        self.commands[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def find_elements(self, by, value):
+        self.command('findElements')
+        return [FakeElement(self, children=row) for row in self.rows]
+
+    def execute_script(self, script, *args):
+        self.command('executeScript')
+        fields = args[0] if args else {}
+        return [{key: row.get(class_name) for key, class_name in fields.items()} for row in self.rows]
+
+
+def synthetic_holdings(count):
+    """Rows keyed by the holding field class names, shaped like the live holdings table."""
+    return [
+        {
+            'symbol': f"SYM{i:05d}",
+            'quantity': f"{(i % 500) + 1:,}",
+            'current-price': f"₹{1000 + i * 0.37:,.2f}",
+            'pnl': f"{'+' if i % 3 else '-'}{(i % 97) / 10:.1f}%"
+        }
+        for i in range(count)
+    ]
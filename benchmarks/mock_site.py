@@ -0,0 +1,96 @@
+"""Local mock of the trading site for browser benchmarks.
+
+The pages (login, holdings with chart, timeframe buttons and close button) are the ones in
+fixtures/replay; the holdings and candle responses are generated for any portfolio size.
+"""
+import json
+import os
+import random
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(REPO_ROOT, 'fixtures', 'replay')
+PAGES = ('Login.html', os.path.join('dashboard', 'holdings.html'))
+
+
+def mock_symbols(count):
+    """Fixed-width symbols, so no symbol is a substring of another."""
+    return [f"MOCK{i:04d}" for i in range(1, count + 1)]
+
+
+# Third-party style weight added to every page by `assets`: a render-blocking tracker, a web font, images
+TRACKER_JS = """
+var until = Date.now() + 30;
+while (Date.now() < until) {}
+new Image().src = '/analytics/pixel.gif?t=' + Date.now();
+"""
+
+
+def _asset_markup(assets):
+    head = ('<script src="/analytics/tracker.js"></script>'
+            '<style>@font-face { font-family: brand; src: url(/static/fonts/brand.woff2); } '
+            'body { font-family: brand, sans-serif; }</style>')
+    body = ''.join(f'<img src="/static/img/banner{i}.png" width="1" height="1">' for i in range(assets))
+    body += '<img src="/ads/banner.jpg" width="1" height="1">'
+    return head, body
+
+
+def _write_assets(root, assets, rng):
+    files = {os.path.join('analytics', 'tracker.js'): TRACKER_JS.encode(),
+             os.path.join('analytics', 'pixel.gif'): rng.randbytes(64),
+             os.path.join('static', 'fonts', 'brand.woff2'): rng.randbytes(60 * 1024),
+             os.path.join('ads', 'banner.jpg'): rng.randbytes(120 * 1024)}
+    files.update({os.path.join('static', 'img', f"banner{i}.png"): rng.randbytes(150 * 1024) for i in range(assets)})
+    for name, data in files.items():
+        os.makedirs(os.path.dirname(os.path.join(root, name)), exist_ok=True)
+        with open(os.path.join(root, name), 'wb') as f:
+            f.write(data)
+
+
+def build_mock_site(root, positions=20, bars=200, seed=7, assets=0):
+    """Write the mock pages and `positions` holdings with `bars` hourly candles each under `root`.
+
+    `assets` > 0 adds that many images plus a tracker script, a web font and an ad to every page.
+    """
+    rng = random.Random(seed)
+    for page in PAGES:
+        os.makedirs(os.path.dirname(os.path.join(root, page)), exist_ok=True)
+        with open(os.path.join(PAGES_DIR, page)) as f:
+            html = f.read()
+        if assets:
+            head, body = _asset_markup(assets)
+            html = html.replace('</head>', head + '</head>').replace('</body>', body + '</body>')
+        with open(os.path.join(root, page), 'w') as f:
+            f.write(html)
+    if assets:
+        _write_assets(root, assets, rng)
+    candles_dir = os.path.join(root, 'api', 'candles')
+    os.makedirs(candles_dir, exist_ok=True)
+
+    holdings = []
+    for symbol in mock_symbols(positions):
+        price = rng.uniform(100, 4000)
+        candles = []
+        timestamp = 1767000000 - bars * 3600
+        for _ in range(bars):
+            timestamp += 3600
+            close = max(1.0, price * (1 + rng.gauss(0, 0.01)))
+            high = max(price, close) * (1 + rng.uniform(0, 0.005))
+            low = min(price, close) * (1 - rng.uniform(0, 0.005))
+            candles.append([timestamp, round(price, 2), round(high, 2), round(low, 2), round(close, 2),
+                            rng.randint(10000, 2000000)])
+            price = close
+        with open(os.path.join(candles_dir, f"{symbol}.json"), 'w') as f:
+            json.dump({'candles': candles}, f)
+        holdings.append({'symbol': symbol, 'quantity': rng.randint(1, 500), 'ltp': round(price, 2),
+                         'pnl': f"{rng.uniform(-20, 20):+.2f}%"})
+
+    with open(os.path.join(root, 'api', 'holdings.json'), 'w') as f:
+        json.dump({'data': holdings}, f)
+    return root
+
+
+def point_config_at(base_url):
+    """Route the app's URLs to the mock; must run before config's URLs are first read."""
+    os.environ['KOTAK_BASE_URL'] = base_url
+    for name in ('KOTAK_LOGIN_URL', 'KOTAK_PORTFOLIO_URL'):
+        os.environ.pop(name, None)
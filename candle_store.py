@@ -0,0 +1,133 @@
+import os
+import re
+import threading
+from datetime import datetime
+import numpy as np
+from config import CANDLE_STORE_DIR
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# One append-only file of fixed-width little-endian values per column, per symbol and timeframe:
+#   <root>/<SYMBOL>/<timeframe>/<column>.bin
+# Row i of every column is one candle; timestamps are strictly increasing epoch seconds. The last row
+# is rewritten in place while its candle is still forming; missing values are NaN.
+COLUMNS = {
+    'timestamp': np.dtype('<i8'),
+    'open': np.dtype('<f8'),
+    'high': np.dtype('<f8'),
+    'low': np.dtype('<f8'),
+    'close': np.dtype('<f8'),
+    'volume': np.dtype('<f8')
+}
+
+
+def to_epoch_seconds(value):
+    """Normalize a candle timestamp (epoch seconds/milliseconds or ISO string) to epoch seconds."""
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+    value = float(value)
+    return int(value / 1000) if value > 1e11 else int(value)
+
+
+def _safe_name(name):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+
+
+class CandleStore:
+    def __init__(self, root=CANDLE_STORE_DIR):
+        self.root = root
+        self.logger = logger
+        self._lock = threading.Lock()
+
+    def high_water_mark(self, symbol, timeframe):
+        """Timestamp of the newest stored candle, or None when nothing is stored."""
+        directory = self._directory(symbol, timeframe)
+        return self._last_timestamp(directory, self._rows(directory))
+
+    def append(self, symbol, timeframe, candles):
+        """Append the candles newer than the high-water mark and rewrite the one at it, which may still
+        have been forming when it was stored; returns how many rows were written."""
+        with self._lock:
+            directory = self._directory(symbol, timeframe)
+            os.makedirs(directory, exist_ok=True)
+            rows = self._rows(directory, repair=True)
+            high_water_mark = self._last_timestamp(directory, rows)
+            latest = {}
+            current = None
+            for candle in candles:
+                timestamp = to_epoch_seconds(candle['timestamp'])
+                if high_water_mark is None or timestamp > high_water_mark:
+                    latest[timestamp] = candle
+                elif timestamp == high_water_mark:
+                    current = candle
+            if current is not None:
+                # Columns are fixed-width, so the last row is overwritten in place
+                self._write(directory, [high_water_mark], [current], offset=rows - 1)
+            if not latest:
+                return int(current is not None)
+            timestamps = sorted(latest)
+            self._write(directory, timestamps, [latest[t] for t in timestamps])
+            self.logger.info("Stored %d new %s candles for %s", len(timestamps), timeframe, symbol)
+            return len(timestamps) + int(current is not None)
+
+    def read(self, symbol, timeframe, start=None, end=None, last=None):
+        """Columns for candles with start <= timestamp <= end (or the `last` N), as read-only memmap views."""
+        directory = self._directory(symbol, timeframe)
+        rows = self._rows(directory)
+        if not rows:
+            return {column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS.items()}
+        columns = {column: np.memmap(self._column_path(directory, column), dtype=dtype, mode='r', shape=(rows,))
+                   for column, dtype in COLUMNS.items()}
+        timestamps = columns['timestamp']
+        first = 0 if start is None else int(np.searchsorted(timestamps, to_epoch_seconds(start), side='left'))
+        stop = rows if end is None else int(np.searchsorted(timestamps, to_epoch_seconds(end), side='right'))
+        if last is not None:
+            first = max(first, stop - last)
+        return {column: values[first:stop] for column, values in columns.items()}
+
+    def _write(self, directory, timestamps, candles, offset=None):
+        """Write rows at row `offset`, or at the end of each column; missing values are stored as NaN."""
+        for column, dtype in COLUMNS.items():
+            if column == 'timestamp':
+                values = np.asarray(timestamps, dtype=dtype)
+            else:
+                values = np.asarray([np.nan if candle.get(column) is None else candle[column] for candle in candles],
+                                    dtype=dtype)
+            with open(self._column_path(directory, column), 'ab' if offset is None else 'r+b') as f:
+                if offset is not None:
+                    f.seek(offset * dtype.itemsize)
+                f.write(values.tobytes())
+
+    def _directory(self, symbol, timeframe):
+        return os.path.join(self.root, _safe_name(symbol.upper()), _safe_name(timeframe))
+
+    def _column_path(self, directory, column):
+        return os.path.join(directory, f"{column}.bin")
+
+    def _last_timestamp(self, directory, rows):
+        if not rows:
+            return None
+        itemsize = COLUMNS['timestamp'].itemsize
+        with open(self._column_path(directory, 'timestamp'), 'rb') as f:
+            f.seek((rows - 1) * itemsize)
+            return int(np.frombuffer(f.read(itemsize), dtype=COLUMNS['timestamp'])[0])
+
+    def _rows(self, directory, repair=False):
+        """Complete rows stored; with `repair`, columns left uneven by an interrupted append are trimmed."""
+        sizes = {}
+        for column in COLUMNS:
+            path = self._column_path(directory, column)
+            sizes[column] = os.path.getsize(path) if os.path.exists(path) else 0
+        rows = min(size // COLUMNS[column].itemsize for column, size in sizes.items())
+        if repair:
+            for column, size in sizes.items():
+                if size != rows * COLUMNS[column].itemsize:
+                    path = self._column_path(directory, column)
+                    self.logger.warning("Trimming %s to %s rows after an interrupted append", path, rows)
+                    with open(path, 'r+b') as f:
+                        f.truncate(rows * COLUMNS[column].itemsize)
+        return rows
@@ -1,149 +1,395 @@
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional
+import numpy as np
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time
-from config import EXPLICIT_WAIT, TIMEFRAME, CHART_ANALYSIS_DURATION
+from selenium.common.exceptions import TimeoutException
+from config import (TIMEFRAME, CHART_RERENDER_TIMEOUT, CHART_ANALYSIS_DURATION, CHART_OBSERVATION_SAMPLES,
+                    CHART_SAMPLE_INTERVAL, NETWORK_CAPTURE_TIMEOUT, INDICATOR_HISTORY_BARS)
+from candle_store import to_epoch_seconds
+from indicators import summarize_candles, summarize_columns
+from locators import PICK_JS, RowIndex, SelectorRegistry
 from logger import get_logger
+from profiler import profiler
+from waits import (WaitEngine, STALE_CHART_ATTRIBUTE, chart_closed, chart_rendered, chart_rerendered,
+                   ohlc_populated)
 
 logger = get_logger(__name__)
 
+SNAPSHOT_FIELDS = ('current_price', 'price_change', 'open', 'high', 'low', 'close', 'candle_class')
+
+# Selector registry elements the snapshot reads
+SNAPSHOT_ELEMENTS = ('current_price', 'price_change', 'ohlc', 'candle')
+
+# Reads every chart field in one round trip; fields that are not on the page come back as null.
+# `winners` reports which selector matched per element so the registry can remember it.
+CHART_SNAPSHOT_SCRIPT = PICK_JS + """
+function text(el) { return el ? el.innerText.trim() : null; }
+var hits = {}, winners = {};
+for (var name in arguments[0]) {
+    var hit = pick(arguments[0][name]);
+    hits[name] = hit[1];
+    winners[name] = hit[0];
+}
+var ohlc = hits.ohlc;
+var candle = hits.candle[0];
+var complete = ohlc.length >= 4;
+return {
+    current_price: text(hits.current_price[0]),
+    price_change: text(hits.price_change[0]),
+    open: complete ? text(ohlc[0]) : null,
+    high: complete ? text(ohlc[1]) : null,
+    low: complete ? text(ohlc[2]) : null,
+    close: complete ? text(ohlc[3]) : null,
+    candle_class: candle ? candle.getAttribute('class') : null,
+    winners: winners
+};
+"""
+
+
+@dataclass
+class ChartSnapshot:
+    """Chart readout at one instant; `present` flags which fields were found on the page."""
+    captured_at: float
+    current_price: Optional[str] = None
+    price_change: Optional[str] = None
+    open: Optional[str] = None
+    high: Optional[str] = None
+    low: Optional[str] = None
+    close: Optional[str] = None
+    candle_class: Optional[str] = None
+    present: Dict[str, bool] = field(default_factory=dict)
+
+    @classmethod
+    def from_values(cls, captured_at, values):
+        fields = {name: values.get(name) for name in SNAPSHOT_FIELDS}
+        present = {name: value is not None for name, value in fields.items()}
+        return cls(captured_at=captured_at, present=present, **fields)
+
+    def to_dict(self):
+        return asdict(self)
+
+# Finds the button for a timeframe (its data-timeframe or its label, case-insensitive) and, in the same
+# round trip, stamps the chart drawn now as stale; returns [selector id, button, readout] or null
+TIMEFRAME_BUTTON_SCRIPT = PICK_JS + """
+var hit = pick(arguments[0]), wanted = arguments[1].toLowerCase(), button = null;
+for (var i = 0; i < hit[1].length && !button; i++) {
+    var b = hit[1][i];
+    if ((b.getAttribute('data-timeframe') || '').toLowerCase() === wanted
+            || b.innerText.trim().toLowerCase() === wanted) { button = b; }
+}
+if (!button) { return null; }
+var c = document.getElementsByClassName('chart-container')[0];
+var drawn = c ? c.querySelectorAll('canvas, svg') : [];
+for (var j = 0; j < drawn.length; j++) { drawn[j].setAttribute(arguments[2], '1'); }
+return [hit[0], button, c ? c.innerText : null];
+"""
+
+# Timeframe of the highlighted button, or null when no button is marked as selected
+SHOWN_TIMEFRAME_SCRIPT = PICK_JS + """
+var buttons = pick(arguments[0])[1];
+for (var i = 0; i < buttons.length; i++) {
+    var b = buttons[i];
+    if (/\\b(active|selected)\\b/.test(b.className) || b.getAttribute('aria-pressed') === 'true'
+            || b.getAttribute('aria-selected') === 'true') {
+        return b.getAttribute('data-timeframe') || b.getAttribute('data-interval') || b.innerText.trim() || null;
+    }
+}
+return null;
+"""
+
+
+def empty_analysis():
+    """Analysis with every field unset."""
+    return {
+        'current_price': None,
+        'price_change': None,
+        'price_change_percent': None,
+        'high': None,
+        'low': None,
+        'open': None,
+        'close': None,
+        'volume': None,
+        'trend': None,
+        'resistance_levels': [],
+        'support_levels': [],
+        'samples': []
+    }
+
+
+def trend_from_candle_class(candle_class):
+    """Map a candle's CSS class to UPTREND, DOWNTREND or NEUTRAL."""
+    if 'bullish' in candle_class or 'green' in candle_class:
+        return 'UPTREND'
+    if 'bearish' in candle_class or 'red' in candle_class:
+        return 'DOWNTREND'
+    return 'NEUTRAL'
+
+
 class ChartAnalyzer:
-    def __init__(self, driver):
+    def __init__(self, driver, capture=None, store=None, screenshots=None, row_index=None, selectors=None,
+                 recorder=None):
         self.driver = driver
+        self.capture = capture
+        self.store = store
+        self.screenshots = screenshots
+        self.recorder = recorder
+        # Share the PortfolioAnalyzer's index to reuse its holdings scan; a private one indexes on first use
+        self.row_index = row_index if row_index is not None else RowIndex()
+        self.selectors = selectors or SelectorRegistry()
+        self.symbol = None
+        self.timeframe = TIMEFRAME
+        # Timeframe the open chart was last switched to (None right after opening: the site's default)
+        self.shown_timeframe = None
         self.logger = logger
+        self.waits = WaitEngine(driver)
     
+    @profiler.timed('chart.open_chart')
     def open_chart(self, symbol):
         """Open the candlestick chart for a given stock symbol."""
         try:
-            self.logger.info(f"Opening chart for {symbol}")
+            self.logger.info("Opening chart for %s", symbol)
+            self.symbol = symbol
+            self.shown_timeframe = None
             
-            # Click on the stock row to open chart (adjust selector based on actual structure)
-            stock_element = self.driver.find_element(By.XPATH, f"//td[contains(text(), '{symbol}')]")
+            # Click on the stock row to open chart, found through the holdings row index
+            stock_element = self.row_index.locate(self.driver, symbol)
+            if self.capture:
+                self.capture.mark()
             stock_element.click()
             
-            time.sleep(2)
-            WebDriverWait(self.driver, EXPLICIT_WAIT).until(
-                EC.presence_of_element_located((By.CLASS_NAME, 'chart-container'))
-            )
+            self.waits.until(EC.presence_of_element_located((By.CLASS_NAME, 'chart-container')), 'chart container')
+            self.waits.until(chart_rendered(), 'chart rendered')
             
-            self.logger.info(f"Chart opened for {symbol}")
+            self.logger.info("Chart opened for %s", symbol)
             return True
         except Exception as e:
-            self.logger.error(f"Failed to open chart for {symbol}: {str(e)}")
+            self.logger.error("Failed to open chart for %s: %s", symbol, e)
             raise
     
+    @profiler.timed('chart.set_timeframe')
     def set_timeframe(self, timeframe=TIMEFRAME):
-        """Set the chart timeframe to hourly (1H)."""
+        """Switch the open chart to `timeframe` (e.g. 15m, 1H, 1D) and wait for it to redraw.
+
+        Returns False when there is no button for `timeframe`; the chart is left as it is and `timeframe`
+        becomes the one its highlighted button shows (None if no button is highlighted).
+        """
         try:
-            self.logger.info(f"Setting timeframe to {timeframe}")
+            if self.shown_timeframe == timeframe:
+                return True
+            self.logger.info("Setting timeframe to %s", timeframe)
             
-            # Find timeframe button (adjust selector based on actual UI)
-            timeframe_buttons = self.driver.find_elements(By.CLASS_NAME, 'timeframe-btn')
-            for btn in timeframe_buttons:
-                if '1H' in btn.text or '1h' in btn.text.lower():
-                    btn.click()
-                    time.sleep(1)
-                    self.logger.info(f"Timeframe set to {timeframe}")
-                    return True
+            candidates = self.selectors.candidates('timeframe_button')
+            found = self.driver.execute_script(TIMEFRAME_BUTTON_SCRIPT, candidates, timeframe, STALE_CHART_ATTRIBUTE)
+            if not found:
+                shown = self.driver.execute_script(SHOWN_TIMEFRAME_SCRIPT, candidates)
+                self.logger.warning("No %s timeframe button on the chart; it stays at %s", timeframe,
+                                    shown or 'its unlabelled default timeframe')
+                self.timeframe = self.shown_timeframe = shown
+                return False
+            index, button, readout = found
+            self.selectors.remember('timeframe_button', index)
+            if self.capture:
+                self.capture.mark()
+            button.click()
+            self.timeframe = timeframe
+            self.shown_timeframe = timeframe
             
-            self.logger.warning("Could not find hourly timeframe button, may be already set")
-            return False
+            # Only the redraw is waited for: the container and its controls are already in place
+            try:
+                self.waits.until(chart_rerendered(readout), f"chart re-rendered at {timeframe}",
+                                 timeout=CHART_RERENDER_TIMEOUT)
+            except TimeoutException:
+                self.logger.warning("No redraw seen after switching to %s, reading the chart as is", timeframe)
+            self.logger.info("Timeframe set to %s", timeframe)
+            return True
         except Exception as e:
-            self.logger.error(f"Failed to set timeframe: {str(e)}")
+            self.logger.error("Failed to set timeframe: %s", e)
             raise
     
+    def analyze_timeframes(self, timeframes, screenshot_name=None):
+        """Analyze the open chart at each of `timeframes` in turn, without reopening it.
+        
+        Returns {timeframe: {'analysis', 'screenshot', 'timeframe'}}, where 'timeframe' is the one the chart
+        actually showed. With `screenshot_name`, each timeframe is also captured to that name with
+        '{timeframe}' replaced. If the first timeframe has no button, the chart is analyzed as displayed;
+        a later one without a button gets {'analysis': None, 'screenshot': None, 'timeframe': None, 'error'}.
+        """
+        captures = {}
+        for position, timeframe in enumerate(timeframes):
+            if not self.set_timeframe(timeframe) and position:
+                captures[timeframe] = {'analysis': None, 'screenshot': None, 'timeframe': None,
+                                       'error': f"No {timeframe} timeframe button on the chart"}
+                continue
+            analysis = self.analyze_current_movement()
+            screenshot = None
+            if screenshot_name:
+                screenshot = self.take_screenshot(screenshot_name.replace('{timeframe}', timeframe))
+            captures[timeframe] = {'analysis': analysis, 'screenshot': screenshot, 'timeframe': self.timeframe}
+        return captures
+    
+    @profiler.timed('chart.analyze_current_movement')
     def analyze_current_movement(self):
         """Analyze current stock movement from the chart."""
         try:
             self.logger.info("Analyzing chart movement")
             
-            analysis = {
-                'current_price': None,
-                'price_change': None,
-                'price_change_percent': None,
-                'high': None,
-                'low': None,
-                'open': None,
-                'close': None,
-                'volume': None,
-                'trend': None,
-                'resistance_levels': [],
-                'support_levels': []
-            }
+            # Prefer the candle array the chart fetched; it is complete before the chart paints
+            if self.capture:
+                candles = self._captured_candles()
+                if candles:
+                    stored = self._store_candles(candles)
+                    if self.recorder:
+                        self.recorder.chart(self.symbol, self.timeframe, candles=candles, stored=stored)
+                    return self.analyze_candles(candles, stored)
+                self.logger.info("No captured candle response, reading the chart readout")
             
-            # Wait for chart to fully load
-            time.sleep(2)
-            
-            # Extract current price (adjust selector based on actual HTML)
-            try:
-                current_price_elem = self.driver.find_element(By.CLASS_NAME, 'current-price')
-                analysis['current_price'] = current_price_elem.text
-                self.logger.info(f"Current Price: {analysis['current_price']}")
-            except:
-                self.logger.warning("Could not extract current price")
-            
-            # Extract price change
-            try:
-                price_change_elem = self.driver.find_element(By.CLASS_NAME, 'price-change')
-                analysis['price_change'] = price_change_elem.text
-                self.logger.info(f"Price Change: {analysis['price_change']}")
-            except:
-                self.logger.warning("Could not extract price change")
-            
-            # Extract OHLC (Open, High, Low, Close) values
+            # Wait for the OHLC readout to be populated
             try:
-                ohlc_values = self.driver.find_elements(By.CLASS_NAME, 'ohlc-value')
-                if len(ohlc_values) >= 4:
-                    analysis['open'] = ohlc_values[0].text
-                    analysis['high'] = ohlc_values[1].text
-                    analysis['low'] = ohlc_values[2].text
-                    analysis['close'] = ohlc_values[3].text
-                    self.logger.info(f"OHLC - O:{analysis['open']} H:{analysis['high']} L:{analysis['low']} C:{analysis['close']}")
-            except:
-                self.logger.warning("Could not extract OHLC values")
+                self.waits.until(ohlc_populated(self.selectors.candidates('ohlc')), 'OHLC values')
+            except TimeoutException:
+                self.logger.warning("OHLC values not populated in time, reading what is available")
             
-            # Determine trend (simple: if close > open, uptrend; else downtrend)
-            try:
-                candle_color = self.driver.find_element(By.CLASS_NAME, 'candle').get_attribute('class')
-                if 'bullish' in candle_color or 'green' in candle_color:
-                    analysis['trend'] = 'UPTREND'
-                elif 'bearish' in candle_color or 'red' in candle_color:
-                    analysis['trend'] = 'DOWNTREND'
-                else:
-                    analysis['trend'] = 'NEUTRAL'
-                self.logger.info(f"Trend: {analysis['trend']}")
-            except:
-                self.logger.warning("Could not determine trend")
-            
-            # Analyze for 5 minutes (default) before moving on
-            self.logger.info(f"Analyzing chart for {CHART_ANALYSIS_DURATION} seconds")
-            time.sleep(CHART_ANALYSIS_DURATION)
-            
-            return analysis
+            # Sample the chart until enough snapshots are taken (bounded by CHART_ANALYSIS_DURATION)
+            snapshots = self.sample_snapshots()
+            if self.recorder:
+                self.recorder.chart(self.symbol, self.timeframe, snapshots=snapshots)
+            return self.analyze_snapshots(snapshots)
         except Exception as e:
-            self.logger.error(f"Failed to analyze chart: {str(e)}")
+            self.logger.error("Failed to analyze chart: %s", e)
             raise
     
+    def analyze_snapshots(self, snapshots):
+        """Analysis from chart readout snapshots; needs no browser, so recorded snapshots replay through it."""
+        analysis = empty_analysis()
+        analysis['samples'] = [snapshot.to_dict() for snapshot in snapshots]
+        if not snapshots:
+            self.logger.warning("No chart values could be read")
+            return analysis
+        
+        latest = snapshots[-1]
+        for name in ('current_price', 'price_change', 'open', 'high', 'low', 'close'):
+            analysis[name] = getattr(latest, name)
+        missing = [name for name, present in latest.present.items() if not present]
+        if missing:
+            self.logger.warning("Chart fields not found: %s", ', '.join(missing))
+        self.logger.info("Current Price: %s, Change: %s", analysis['current_price'], analysis['price_change'])
+        self.logger.info("OHLC - O:%s H:%s L:%s C:%s", analysis['open'], analysis['high'], analysis['low'],
+                         analysis['close'])
+        
+        # Determine trend from the candle styling (bullish/green vs bearish/red)
+        if latest.present['candle_class']:
+            analysis['trend'] = trend_from_candle_class(latest.candle_class)
+            self.logger.info("Trend: %s", analysis['trend'])
+        
+        return analysis
+    
+    def _captured_candles(self):
+        """Candles from the captured chart response, waiting briefly for it to finish."""
+        try:
+            return self.waits.until(lambda driver: self.capture.candles(), 'captured candles',
+                                    timeout=NETWORK_CAPTURE_TIMEOUT)
+        except TimeoutException:
+            return []
+    
+    def _store_candles(self, candles):
+        """Persist the candles from the stored high-water mark on (the bar at it may have been still forming
+        when stored); returns that mark and the stored history the indicators run over, or None without a store.
+        """
+        if not (self.store and self.symbol and self.timeframe):
+            return None
+        high_water_mark = self.store.high_water_mark(self.symbol, self.timeframe)
+        self.store.append(self.symbol, self.timeframe, [candle for candle in candles if high_water_mark is None
+                                                        or to_epoch_seconds(candle['timestamp']) >= high_water_mark])
+        history = self.store.read(self.symbol, self.timeframe, last=INDICATOR_HISTORY_BARS)
+        # Plain lists, so a recording of them replays through analyze_candles exactly as analyzed live
+        return {'high_water_mark': high_water_mark,
+                'history': {column: values.tolist() for column, values in history.items()}}
+
+    def analyze_candles(self, candles, stored=None):
+        """Analysis from captured candles: latest candle for the readout, indicators from the series.
+
+        `stored` is what _store_candles returned; with it the indicators run over the stored history.
+        Needs no browser or store, so recorded candles replay through it.
+        """
+        analysis = empty_analysis()
+        latest = candles[-1]
+        analysis['candles'] = candles
+        analysis['current_price'] = latest['close']
+        # Change since the previous bar's close, as the chart readout shows it (a signed string, as on the DOM path)
+        previous_close = candles[-2]['close'] if len(candles) > 1 else None
+        for name in ('open', 'high', 'low', 'close', 'volume'):
+            analysis[name] = latest[name]
+        
+        indicators = None
+        if stored is not None:
+            # Only the candles from the high-water mark on were new to the store
+            high_water_mark = stored['high_water_mark']
+            analysis['candles'] = [candle for candle in candles if high_water_mark is None
+                                   or to_epoch_seconds(candle['timestamp']) >= high_water_mark]
+            history = {column: np.asarray(values, dtype=np.float64) for column, values in stored['history'].items()}
+            if len(history['close']):
+                indicators = summarize_columns(history['high'], history['low'], history['close'], history['volume'])
+            if previous_close is None and len(history['close']) > 1:
+                previous_close = float(history['close'][-2])
+        if previous_close is not None:
+            analysis['price_change'] = f"{latest['close'] - previous_close:+.2f}"
+        if indicators is None:
+            indicators = summarize_candles(candles)
+        analysis['trend'] = indicators['trend']
+        analysis['support_levels'] = indicators['support_levels']
+        analysis['resistance_levels'] = indicators['resistance_levels']
+        analysis['price_change_percent'] = indicators['price_change_percent']
+        analysis['indicators'] = indicators
+        self.logger.info("Captured %d candles, close %s, trend %s", len(candles), latest['close'], analysis['trend'])
+        return analysis
+    
+    def snapshot(self):
+        """Capture every chart field in one round trip."""
+        candidates = {name: self.selectors.candidates(name) for name in SNAPSHOT_ELEMENTS}
+        data = self.driver.execute_script(CHART_SNAPSHOT_SCRIPT, candidates) or {}
+        for name, index in data.pop('winners', {}).items():
+            self.selectors.remember(name, index)
+        return ChartSnapshot.from_values(time.time(), data)
+    
+    def sample_snapshots(self, samples=CHART_OBSERVATION_SAMPLES, interval=CHART_SAMPLE_INTERVAL,
+                         max_duration=CHART_ANALYSIS_DURATION):
+        """Take `samples` snapshots `interval` seconds apart, stopping at `max_duration`."""
+        self.logger.info("Sampling chart %s times every %ss (max %ss)", samples, interval, max_duration)
+        
+        def _sample():
+            snapshot = self.snapshot()
+            return snapshot if any(snapshot.present.values()) else None
+        
+        return self.waits.observe(_sample, samples=samples, interval=interval,
+                                  max_duration=max_duration, step='chart observation')
+    
+    @profiler.timed('chart.take_screenshot')
     def take_screenshot(self, filename):
-        """Take a screenshot of the current chart."""
+        """Take a screenshot of the current chart; returns the saved path, or None on failure."""
         try:
-            self.logger.info(f"Taking screenshot: {filename}")
+            self.logger.info("Taking screenshot: %s", filename)
+            if self.screenshots:
+                # Only the element grab happens here; encoding and writing continue in the background
+                return self.screenshots.capture(self.driver, filename, key=f"{self.symbol}:{self.timeframe}")
             self.driver.save_screenshot(filename)
-            self.logger.info(f"Screenshot saved to {filename}")
-            return True
+            self.logger.info("Screenshot saved to %s", filename)
+            return filename
         except Exception as e:
-            self.logger.error(f"Failed to take screenshot: {str(e)}")
-            return False
+            self.logger.error("Failed to take screenshot: %s", e)
+            return None
     
+    @profiler.timed('chart.close_chart')
     def close_chart(self):
         """Close the chart and return to portfolio."""
         try:
             self.logger.info("Closing chart")
-            close_btn = self.driver.find_element(By.CLASS_NAME, 'close-chart')
+            close_btn = self.selectors.find(self.driver, 'close_button')
             close_btn.click()
-            time.sleep(1)
+            self.waits.until(chart_closed(), 'chart closed')
             self.logger.info("Chart closed")
             return True
         except Exception as e:
-            self.logger.error(f"Failed to close chart: {str(e)}")
+            self.logger.error("Failed to close chart: %s", e)
             return False
@@ -0,0 +1,125 @@
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import config
+from config import CHART_WORKERS
+from login import KotakLogin
+from portfolio import PortfolioAnalyzer
+from chart_analyzer import ChartAnalyzer
+from logger import get_logger
+from network_capture import capture_for
+from session_cache import apply_session
+
+logger = get_logger(__name__)
+
+
+class ChartSession:
+    """A worker browser that shares the main session's state and sits on the holdings page."""
+
+    def __init__(self, session_state, name, store=None, screenshots=None, recorder=None):
+        self.name = name
+        self.login = KotakLogin(keep_chart_assets=screenshots is not None)
+        driver = self.login.setup_driver()
+        try:
+            apply_session(driver, session_state, config.KOTAK_LOGIN_URL)
+            capture = capture_for(driver)
+            # Kept for the life of the worker: it returns the browser to the holdings page between retries
+            self.portfolio_analyzer = PortfolioAnalyzer(driver, capture=capture)
+            self.portfolio_analyzer.navigate_to_portfolio()
+        except Exception:
+            self.login.close()
+            raise
+        self.chart_analyzer = ChartAnalyzer(driver, capture=capture, store=store, screenshots=screenshots,
+                                            row_index=self.portfolio_analyzer.row_index, recorder=recorder)
+
+    def reset(self):
+        """Return to the holdings page after a failure; False if the browser is unusable."""
+        try:
+            self.portfolio_analyzer.return_to_holdings()
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        self.login.close()
+
+
+class ChartWorkerPool:
+    def __init__(self, session_state, workers=CHART_WORKERS, store=None, screenshots=None, recorder=None):
+        self.session_state = session_state
+        self.store = store
+        self.screenshots = screenshots
+        self.recorder = recorder
+        self.workers = max(1, workers)
+        self.logger = logger
+        self._idle = queue.Queue()
+        self._sessions = []
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+
+    def map(self, analyze, jobs, on_result=None):
+        """Run `analyze(chart_analyzer, symbol, position, portfolio_analyzer)` for each job, with the worker's
+        chart and holdings analyzers; results keep job order, None on failure.
+
+        `on_result(result)` is called from the worker thread as soon as each analysis succeeds.
+        """
+        self.logger.info("Analyzing %d symbols with %s workers", len(jobs), self.workers)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='chart-worker') as executor:
+            futures = [executor.submit(self._run, analyze, symbol, position, on_result) for symbol, position in jobs]
+            return [future.result() for future in futures]
+
+    def close(self):
+        """Quit every worker browser."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            try:
+                session.close()
+            except Exception as e:
+                self.logger.warning("Failed to close %s: %s", session.name, e)
+
+    def _run(self, analyze, symbol, position, on_result=None):
+        try:
+            session = self._acquire()
+        except Exception as e:
+            self.logger.error("Could not start a worker browser for %s: %s", symbol, e)
+            return None
+        healthy = True
+        try:
+            result = analyze(session.chart_analyzer, symbol, position, session.portfolio_analyzer)
+        except Exception as e:
+            self.logger.error("[%s] Failed to analyze %s: %s", session.name, symbol, e)
+            healthy = session.reset()
+            return None
+        finally:
+            self._release(session, healthy)
+        if on_result:
+            on_result(result)
+        return result
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        name = f"worker-{next(self._counter)}"
+        self.logger.info("Starting %s", name)
+        session = ChartSession(self.session_state, name, store=self.store, screenshots=self.screenshots,
+                               recorder=self.recorder)
+        with self._lock:
+            self._sessions.append(session)
+        return session
+
+    def _release(self, session, healthy):
+        if healthy:
+            self._idle.put(session)
+            return
+        self.logger.warning("Discarding %s after an unrecoverable failure", session.name)
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+        try:
+            session.close()
+        except Exception:
+            pass
@@ -0,0 +1,50 @@
+import json
+import os
+from datetime import datetime
+from config import CHECKPOINT_FILE
+from report_writer import read_records
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class RunCheckpoint:
+    """Remembers an unfinished run's report so a restart can skip the symbols it already analyzed.
+
+    The streamed report is the record of completed work; the checkpoint file only points at it.
+    """
+
+    def __init__(self, path=CHECKPOINT_FILE):
+        self.path = path
+        self.logger = logger
+
+    def start(self, requested, report_path):
+        """Record a new run for the `requested` symbols (None means the default selection)."""
+        state = {'requested': requested, 'report': report_path, 'started_at': datetime.now().isoformat()}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def resume(self, requested):
+        """(report path, completed symbols) of an interrupted run for the same request, or None."""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning("Ignoring unreadable checkpoint %s: %s", self.path, e)
+            return None
+        if state.get('requested') != requested or not os.path.exists(state.get('report') or ''):
+            self.logger.info("Checkpoint is for a different run, starting fresh")
+            return None
+        completed = {record['symbol'].upper() for record in read_records(state['report'])}
+        self.logger.info("Resuming run from %s: %d symbols already done", state['started_at'], len(completed))
+        return state['report'], completed
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
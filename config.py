@@ -1,31 +1,174 @@
 import os
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Settings read from the environment (or a .env file) are resolved on first access, so importing
+# config has no side effects; .env is loaded the first time one of them is read.
+_ENV_SETTINGS = {
+    # Kotak Securities Credentials
+    'KOTAK_PHONE_NUMBER': lambda: os.getenv('KOTAK_PHONE_NUMBER', 'your_phone_number'),
+    'KOTAK_PASSWORD': lambda: os.getenv('KOTAK_PASSWORD', 'your_password'),
+    # Website URLs (KOTAK_BASE_URL, or each URL, can point at another host, e.g. a local mock)
+    'KOTAK_BASE_URL': lambda: os.getenv('KOTAK_BASE_URL', 'https://ntrade.kotaksecurities.com').rstrip('/'),
+    'KOTAK_LOGIN_URL': lambda: os.getenv('KOTAK_LOGIN_URL', f"{__getattr__('KOTAK_BASE_URL')}/Login"),
+    'KOTAK_PORTFOLIO_URL': lambda: os.getenv('KOTAK_PORTFOLIO_URL', f"{__getattr__('KOTAK_BASE_URL')}/dashboard/holdings"),
+    # Run the browser without a window
+    'HEADLESS': lambda: os.getenv('KOTAK_HEADLESS', 'false').lower() in ('1', 'true', 'yes'),
+}
 
-# Kotak Securities Credentials
-KOTAK_PHONE_NUMBER = os.getenv('KOTAK_PHONE_NUMBER', 'your_phone_number')
-KOTAK_PASSWORD = os.getenv('KOTAK_PASSWORD', 'your_password')
+_env_loaded = False
+
+
+def load_env():
+    """Load the .env file into the environment (once)."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def __getattr__(name):
+    if name not in _ENV_SETTINGS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    load_env()
+    value = globals()[name] = _ENV_SETTINGS[name]()
+    return value
 
-# Website URLs
-KOTAK_LOGIN_URL = 'https://ntrade.kotaksecurities.com/Login'
-KOTAK_PORTFOLIO_URL = 'https://ntrade.kotaksecurities.com/dashboard/holdings'
 
 # Selenium Configuration
 BROWSER = 'chrome'  # or 'firefox' or 'safari'
 IMPLICIT_WAIT = 10  # seconds
 EXPLICIT_WAIT = 15  # seconds
-HEADLESS = False  # Set to True to run in headless mode
+DRIVER_MANIFEST_FILE = '.driver_manifest.json'  # resolved driver binaries, so startup skips probing
+DRIVER_MANIFEST_TTL = 7 * 24 * 60 * 60  # seconds before a cached driver path is re-resolved
+
+# Lean Page Load Configuration
+LEAN_MODE = False  # eager page loads, blocked heavy assets, small viewport, no extensions/background networking
+LEAN_PAGE_LOAD_STRATEGY = 'eager'  # return from navigation at DOMContentLoaded
+LEAN_WINDOW_SIZE = (1280, 800)
+LEAN_BLOCKED_URL_PATTERNS = [  # Chrome URL patterns ('*' wildcards) never fetched in lean mode
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.ico', '*.svg',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.mp4', '*.webm',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*facebook.net*', '*hotjar.com*',
+    '*/analytics/*', '*/tracking/*', '*/ads/*'
+]
+LEAN_SCREENSHOT_ALLOWLIST = [  # still fetched when screenshots are taken, so chart labels and icons render
+    '*.svg', '*.woff', '*.woff2', '*.ttf', '*.otf'
+]
+
+# Session Cache Configuration
+SESSION_CACHE_ENABLED = True  # reuse a saved login on warm starts
+SESSION_CACHE_FILE = '.kotak_session.json'
+SESSION_CACHE_TTL = 6 * 60 * 60  # seconds a saved session is trusted
+SESSION_PROBE_TIMEOUT = 5  # seconds to confirm a restored session reaches the holdings page
+
+# Wait Engine Configuration
+WAIT_POLL_INTERVAL = 0.2  # seconds between readiness checks
+DOM_STABLE_PERIOD = 0.5  # seconds the DOM must stay unchanged to count as stable
 
 # Chart Analysis Configuration
 TIMEFRAME = '1H'  # 1H for hourly
-CHART_ANALYSIS_DURATION = 300  # seconds to analyze chart before closing
+CHART_TIMEFRAMES = [TIMEFRAME]  # captured one after another in a single chart open; the first is the primary
+CHART_RERENDER_TIMEOUT = 5  # seconds to wait for the chart to redraw after a timeframe switch
+CHART_ANALYSIS_DURATION = 300  # maximum seconds to observe a chart before closing
+CHART_OBSERVATION_SAMPLES = 5  # observation ends as soon as this many samples are taken
+CHART_SAMPLE_INTERVAL = 1.0  # sampling rate: seconds between chart snapshots
+CHART_WORKERS = 1  # browsers analyzing charts in parallel (1 = analyze in the main browser)
+
+# Selector Configuration
+CHART_SELECTORS = {  # logical chart element -> fallback selectors in order (CSS, or XPath when starting with / or ()
+    'current_price': ['.current-price', '[data-field="ltp"]', '.ltp'],
+    'price_change': ['.price-change', '[data-field="change"]', '.change'],
+    'ohlc': ['.ohlc-value', '.ohlc span', '[data-field="ohlc"] span'],
+    'candle': ['.candle', '[class*="candle"]'],
+    'close_button': ['.close-chart', '[aria-label="Close chart"]', "//button[normalize-space()='Close']"],
+    'timeframe_button': ['.timeframe-btn', 'button[data-timeframe]', '[data-interval]']
+}
+
+# Network Capture Configuration (Chrome only)
+NETWORK_CAPTURE = False  # read holdings and candles from the app's JSON responses, DOM scraping as fallback
+NETWORK_CAPTURE_TIMEOUT = 5  # seconds to wait for a captured response before falling back to the DOM
+HOLDINGS_API_PATTERN = r'/holdings'  # regex matched against JSON response URLs
+CHART_API_PATTERN = r'/(candles|chart|history)'
+HOLDINGS_API_FIELDS = {  # position field -> candidate keys in the holdings response
+    'symbol': ['symbol', 'tradingSymbol', 'sym'],
+    'quantity': ['quantity', 'qty', 'holdingQty'],
+    'current_price': ['current_price', 'ltp', 'lastPrice', 'price'],
+    'pnl': ['pnl', 'unrealizedPnl', 'profitLoss']
+}
+CANDLE_API_FIELDS = {  # candle field -> candidate keys; array rows use this order
+    'timestamp': ['timestamp', 'time', 't', 'date'],
+    'open': ['open', 'o'],
+    'high': ['high', 'h'],
+    'low': ['low', 'l'],
+    'close': ['close', 'c'],
+    'volume': ['volume', 'v']
+}
+
+# Candle Store Configuration
+CANDLE_STORE_ENABLED = True  # keep captured candles on disk and append only new ones
+CANDLE_STORE_DIR = 'candle_store'
+INDICATOR_HISTORY_BARS = 5000  # stored bars fed to the indicators
+
+# Screenshot Configuration
+SCREENSHOT_DIR = os.path.join('screenshots', 'charts')
+SCREENSHOT_MAX_BYTES = 200 * 1024 * 1024  # oldest frames are evicted beyond this
+SCREENSHOT_WORKERS = 2  # background threads encoding and writing frames
+SCREENSHOT_HASH_DISTANCE = 4  # frames within this many differing hash bits (of 64) count as unchanged
+SCREENSHOT_FORMAT = 'png'  # 'png' or 'webp' (re-encoding needs Pillow)
+
+# Monitor Mode Configuration
+MONITOR_POLL_INTERVAL = 300  # seconds between holdings polls
+MONITOR_MAX_ANALYSES_PER_CYCLE = 5  # chart analyses per poll, biggest movers first
+
+# Service Configuration
+SERVICE_HOST = '127.0.0.1'  # the service has no authentication; keep it on localhost
+SERVICE_PORT = 8766
+SERVICE_CACHE_TTL = 30  # seconds a result is served again without touching the browser
+SERVICE_POSITIONS_TTL = 60  # seconds before a chart request re-reads the holdings page
+SERVICE_QUEUE_SIZE = 32  # requests waiting for the browser before new ones are refused
+SERVICE_REQUEST_TIMEOUT = 300  # seconds an HTTP request waits for its result
+
+# Multi-Account Configuration
+ACCOUNTS_FILE = 'accounts.json'  # [{"name", "phone_number", "password" or "password_env", "symbols"}, ...]
+ACCOUNTS_DIR = 'accounts'  # one working directory per account: browser profile, log, session, report
+ACCOUNT_MAX_WORKERS = 4  # accounts run at once, further capped by CPU count and available memory
+ACCOUNT_BROWSER_MEMORY = 700 * 1024 * 1024  # bytes budgeted per browser when capping by memory
+
+# Record and Replay Configuration
+RECORD_ENABLED = False  # save the holdings and chart data each run analyzes, for offline replay
+RECORDINGS_DIR = 'recordings'  # sessions/ manifests plus content-addressed objects/ shared across runs
+RECORDING_CACHE_OBJECTS = 512  # decoded snapshots kept in memory while replaying
+
+# Report Configuration
+REPORT_DIR = '.'
+REPORT_FSYNC_EVERY = 5  # results between fsyncs of the NDJSON report (every result is flushed)
+REPORT_EXPORT_COLUMNAR = False  # also write a compressed .npz of the report's scalar columns
+
+# Checkpoint and Retry Configuration
+CHECKPOINT_FILE = '.kotak_checkpoint.json'
+ANALYSIS_RETRIES = 2  # extra attempts per symbol before giving up on it
+ANALYSIS_RETRY_BACKOFF = 5.0  # seconds before the first retry, doubling each time
+
+# Profiling Configuration
+PROFILE_ENABLED = True  # time steps and WebDriver commands and write profile_YYYYMMDD_HHMMSS.json per run
+PROFILE_MAX_SPANS = 10000  # individual spans kept in the profile (per-step aggregates are always kept)
 
 # Analysis Thresholds
 PRICE_CHANGE_THRESHOLD = 0.5  # percentage
 VOLUME_THRESHOLD = 1000000  # minimum volume
 
+# Indicator Configuration
+SMA_WINDOWS = (20, 50)  # moving average lengths in bars
+ATR_WINDOW = 14  # average true range length in bars
+SWING_ORDER = 3  # bars on each side a swing high/low must exceed
+SUPPORT_RESISTANCE_LEVELS = 3  # nearest levels reported on each side of the price
+
 # Log Configuration
 LOG_LEVEL = 'INFO'
 LOG_FILE = 'kotak_analyzer.log'
+LOG_FORMAT = 'text'  # 'text' or 'json' (one object per line)
+LOG_ASYNC = True  # hand records to a background thread instead of writing on the caller's thread
+LOG_MAX_BYTES = 10 * 1024 * 1024  # rotate the log file beyond this size
+LOG_BACKUP_COUNT = 5  # rotated log files kept
+LOG_ROW_HEAD = 20  # per-row messages (e.g. one per holding) logged in full before sampling starts
+LOG_ROW_SAMPLE_EVERY = 100  # after the head, one per-row message in this many is logged
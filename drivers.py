@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+import subprocess
+import time
+from config import (DRIVER_MANIFEST_FILE, DRIVER_MANIFEST_TTL, LEAN_PAGE_LOAD_STRATEGY, LEAN_WINDOW_SIZE,
+                    LEAN_BLOCKED_URL_PATTERNS, LEAN_SCREENSHOT_ALLOWLIST)
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+DRIVER_BINARIES = {'chrome': 'chromedriver', 'firefox': 'geckodriver'}
+
+# System installs (Homebrew) preferred over whatever is on PATH
+SYSTEM_DRIVER_PATHS = {
+    'chrome': ['/opt/homebrew/bin/chromedriver', '/usr/local/bin/chromedriver'],
+    'firefox': ['/opt/homebrew/bin/geckodriver', '/usr/local/bin/geckodriver']
+}
+
+
+def driver_version(path):
+    """First line of `<driver> --version`, or None."""
+    try:
+        output = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.strip().splitlines()[0] if output.strip() else None
+
+
+class DriverManifest:
+    """Driver binary path and version per browser, as last resolved."""
+
+    def __init__(self, path=DRIVER_MANIFEST_FILE, ttl=DRIVER_MANIFEST_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.logger = logger
+
+    def get(self, browser):
+        """The cached entry for `browser` if it is fresh and its binary is still executable, else None."""
+        entry = self._load().get(browser)
+        if not entry:
+            return None
+        if time.time() - entry.get('resolved_at', 0) > self.ttl or not os.access(entry.get('path', ''), os.X_OK):
+            return None
+        return entry
+
+    def put(self, browser, path, source):
+        entry = {'path': path, 'version': driver_version(path), 'source': source, 'resolved_at': time.time()}
+        manifest = self._load()
+        manifest[browser] = entry
+        try:
+            # Account processes share the manifest: each writes its own temp file and swaps it in whole
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.warning("Could not write driver manifest: %s", e)
+        return entry
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning("Ignoring unreadable driver manifest %s: %s", self.path, e)
+            return {}
+
+
+def resolve_driver(browser, manifest=None, download=False):
+    """Path of the driver binary for `browser`: the manifest, else a system install, else webdriver-manager.
+
+    `download=True` skips straight to webdriver-manager, e.g. after the cached binary failed to start.
+    """
+    manifest = manifest or DriverManifest()
+    if not download:
+        entry = manifest.get(browser)
+        if entry:
+            logger.info("Using cached %s %s at %s", DRIVER_BINARIES[browser], entry.get('version') or '', entry['path'])
+            return entry['path']
+        path = _system_driver(browser)
+        if path:
+            logger.info("Using system %s at %s", DRIVER_BINARIES[browser], path)
+            return manifest.put(browser, path, 'system')['path']
+        logger.info("No system %s found; using webdriver-manager to download one", DRIVER_BINARIES[browser])
+    return manifest.put(browser, _download_driver(browser), 'webdriver-manager')['path']
+
+
+def _system_driver(browser):
+    for path in SYSTEM_DRIVER_PATHS.get(browser, []):
+        if os.path.exists(path) and os.access(path, os.X_OK):
+            return path
+    return shutil.which(DRIVER_BINARIES[browser])
+
+
+def _download_driver(browser):
+    # webdriver-manager (and its HTTP stack) is only imported when a driver has to be fetched
+    if browser == 'chrome':
+        from webdriver_manager.chrome import ChromeDriverManager
+        return ChromeDriverManager().install()
+    from webdriver_manager.firefox import GeckoDriverManager
+    return GeckoDriverManager().install()
+
+
+def lean_blocked_patterns(keep_chart_assets=True):
+    """URL patterns blocked in lean mode; with `keep_chart_assets` the screenshot allowlist is left loadable."""
+    allowed = set(LEAN_SCREENSHOT_ALLOWLIST) if keep_chart_assets else set()
+    return [pattern for pattern in LEAN_BLOCKED_URL_PATTERNS if pattern not in allowed]
+
+
+def apply_lean_options(browser, options, keep_chart_assets=True):
+    """Eager page loads, a fixed small viewport and no extensions or background traffic."""
+    options.page_load_strategy = LEAN_PAGE_LOAD_STRATEGY
+    width, height = LEAN_WINDOW_SIZE
+    if browser == 'chrome':
+        for argument in (f'--window-size={width},{height}', '--disable-extensions', '--disable-background-networking',
+                         '--disable-component-update', '--disable-default-apps', '--disable-sync',
+                         '--disable-features=Translate,OptimizationHints,MediaRouter', '--no-first-run',
+                         '--mute-audio'):
+            options.add_argument(argument)
+    elif browser == 'firefox':
+        options.add_argument(f'--width={width}')
+        options.add_argument(f'--height={height}')
+        # Firefox has no URL blocking over WebDriver. Images (which include svg chart icons) and web fonts
+        # can only be switched off wholesale, so that happens only when no screenshots are wanted
+        prefs = {'network.prefetch-next': False, 'network.dns.disablePrefetch': True, 'app.update.auto': False,
+                 'extensions.update.enabled': False, 'datareporting.policy.dataSubmissionEnabled': False}
+        if not keep_chart_assets:
+            prefs.update({'permissions.default.image': 2, 'gfx.downloadable_fonts.enabled': False})
+        for name, value in prefs.items():
+            options.set_preference(name, value)
+    return options
+
+
+def block_urls(driver, patterns):
+    """Stop a Chrome driver from fetching URLs matching `patterns` (applies to every page it loads)."""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+    logger.info("Blocking %d URL patterns", len(patterns))
@@ -0,0 +1,186 @@
+import numpy as np
+from config import (PRICE_CHANGE_THRESHOLD, VOLUME_THRESHOLD, SMA_WINDOWS, ATR_WINDOW, SWING_ORDER,
+                    SUPPORT_RESISTANCE_LEVELS)
+
+# Every function takes one series (n_bars,) or a batch (n_symbols, n_bars) and returns a batch.
+# Batches are right-aligned: the last column is each symbol's latest bar and shorter histories
+# are NaN-padded on the left (see stack_series). All work is whole-array NumPy operations.
+
+
+def as_batch(values):
+    """View `values` as a float (n_symbols, n_bars) array."""
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.newaxis, :] if values.ndim == 1 else values
+
+
+def stack_series(series):
+    """Right-align per-symbol series of different lengths into one NaN-padded batch."""
+    length = max((len(values) for values in series), default=0)
+    batch = np.full((len(series), length), np.nan)
+    for row, values in enumerate(series):
+        if len(values):
+            batch[row, length - len(values):] = values
+    return batch
+
+
+def sma(values, window):
+    """Simple moving average; NaN until `window` valid bars are available."""
+    values = as_batch(values)
+    valid = ~np.isnan(values)
+    zeros = np.zeros((values.shape[0], 1))
+    sums = np.concatenate([zeros, np.cumsum(np.where(valid, values, 0.0), axis=-1)], axis=-1)
+    counts = np.concatenate([zeros, np.cumsum(valid, axis=-1)], axis=-1)
+    out = np.full(values.shape, np.nan)
+    if window <= values.shape[-1]:
+        window_sums = sums[:, window:] - sums[:, :-window]
+        window_counts = counts[:, window:] - counts[:, :-window]
+        out[:, window - 1:] = np.where(window_counts == window, window_sums / window, np.nan)
+    return out
+
+
+def true_range(high, low, close):
+    """Per-bar true range; the first bar uses high - low."""
+    high, low, close = as_batch(high), as_batch(low), as_batch(close)
+    previous_close = np.full(close.shape, np.nan)
+    previous_close[:, 1:] = close[:, :-1]
+    # fmax ignores the NaN previous close on each symbol's first bar
+    return np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+
+
+def atr(high, low, close, window=ATR_WINDOW):
+    """Average true range as a simple moving average of the true range."""
+    return sma(true_range(high, low, close), window)
+
+
+def _window_extreme(values, order, reduce):
+    """`reduce` (np.maximum/np.minimum) over each centred window of 2 * order + 1 bars."""
+    width = values.shape[-1] - 2 * order
+    out = values[:, :width].copy()
+    # Loops over the window offsets only; NaN propagates so padding never forms a swing
+    for offset in range(1, 2 * order + 1):
+        reduce(out, values[:, offset:offset + width], out=out)
+    return out
+
+
+def swing_points(high, low, order=SWING_ORDER):
+    """Masks of swing highs/lows: bars that are the extreme of the `order` bars on each side."""
+    high, low = as_batch(high), as_batch(low)
+    swing_highs = np.zeros(high.shape, dtype=bool)
+    swing_lows = np.zeros(low.shape, dtype=bool)
+    if order >= 1 and high.shape[-1] >= 2 * order + 1:
+        inner = slice(order, high.shape[-1] - order)
+        swing_highs[:, inner] = high[:, inner] == _window_extreme(high, order, np.maximum)
+        swing_lows[:, inner] = low[:, inner] == _window_extreme(low, order, np.minimum)
+    return swing_highs, swing_lows
+
+
+def _smallest(values, count):
+    """The `count` smallest values of each row, ascending."""
+    if count < values.shape[-1]:
+        values = np.partition(values, count - 1, axis=-1)[:, :count]
+    return np.sort(values, axis=-1)
+
+
+def support_resistance(high, low, close, order=SWING_ORDER, levels=SUPPORT_RESISTANCE_LEVELS, swings=None):
+    """Nearest swing lows below and swing highs above the latest close, `levels` of each (NaN if fewer)."""
+    high, low, close = as_batch(high), as_batch(low), as_batch(close)
+    swing_highs, swing_lows = swings if swings is not None else swing_points(high, low, order)
+    last_close = close[:, -1:]
+    above = np.where(swing_highs & (high > last_close), high, np.inf)
+    below = np.where(swing_lows & (low < last_close), low, -np.inf)
+    resistance = _smallest(above, levels)
+    support = -_smallest(-below, levels)
+    resistance[np.isinf(resistance)] = np.nan
+    support[np.isinf(support)] = np.nan
+    return support, resistance
+
+
+def pivot_points(high, low, close):
+    """Classic floor pivots from each symbol's latest bar."""
+    high, low, close = as_batch(high)[:, -1], as_batch(low)[:, -1], as_batch(close)[:, -1]
+    pivot = (high + low + close) / 3.0
+    return {
+        'pivot': pivot,
+        'r1': 2 * pivot - low,
+        's1': 2 * pivot - high,
+        'r2': pivot + (high - low),
+        's2': pivot - (high - low)
+    }
+
+
+def _last_two(mask):
+    """Column indexes of the last and second-to-last True per row (-1 when absent)."""
+    positions = np.where(mask, np.arange(mask.shape[-1]), -1)
+    last = positions.max(axis=-1)
+    positions[np.arange(mask.shape[0]), np.maximum(last, 0)] = -1
+    return positions.max(axis=-1), last
+
+
+def swing_trend(high, low, order=SWING_ORDER, swings=None):
+    """UPTREND on higher highs and higher lows, DOWNTREND on lower highs and lower lows, else NEUTRAL."""
+    high, low = as_batch(high), as_batch(low)
+    swing_highs, swing_lows = swings if swings is not None else swing_points(high, low, order)
+    rows = np.arange(high.shape[0])
+    high_prev, high_last = _last_two(swing_highs)
+    low_prev, low_last = _last_two(swing_lows)
+    known = (high_prev >= 0) & (low_prev >= 0)
+    highs_delta = high[rows, high_last] - high[rows, high_prev]
+    lows_delta = low[rows, low_last] - low[rows, low_prev]
+    trend = np.full(high.shape[0], 'NEUTRAL', dtype=object)
+    trend[known & (highs_delta > 0) & (lows_delta > 0)] = 'UPTREND'
+    trend[known & (highs_delta < 0) & (lows_delta < 0)] = 'DOWNTREND'
+    return trend
+
+
+def threshold_breaches(close, volume, price_threshold=PRICE_CHANGE_THRESHOLD, volume_threshold=VOLUME_THRESHOLD):
+    """Bar-over-bar percent change and masks of bars breaching the price and volume thresholds."""
+    close, volume = as_batch(close), as_batch(volume)
+    change = np.full(close.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change[:, 1:] = (close[:, 1:] / close[:, :-1] - 1.0) * 100.0
+        price_breach = np.abs(change) >= price_threshold
+        volume_breach = volume >= volume_threshold
+    return {
+        'price_change_percent': change,
+        'price_breach': price_breach,
+        'volume_breach': volume_breach
+    }
+
+
+def compute(high, low, close, volume):
+    """Every indicator for a batch, as arrays keyed by name."""
+    result = {f"sma_{window}": sma(close, window) for window in SMA_WINDOWS}
+    result['atr'] = atr(high, low, close)
+    swings = swing_points(high, low)
+    result['support'], result['resistance'] = support_resistance(high, low, close, swings=swings)
+    result['trend'] = swing_trend(high, low, swings=swings)
+    result.update(threshold_breaches(close, volume))
+    return result
+
+
+def _scalar(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def summarize_candles(candles):
+    """Latest indicator values for one symbol's candle dicts, JSON-ready."""
+    columns = {name: np.array([candle[name] for candle in candles], dtype=np.float64)
+               for name in ('high', 'low', 'close', 'volume')}
+    return summarize_columns(columns['high'], columns['low'], columns['close'], columns['volume'])
+
+
+def summarize_columns(high, low, close, volume):
+    """Latest indicator values for one symbol's column arrays, JSON-ready."""
+    result = compute(high, low, close, volume)
+    return {
+        'trend': result['trend'][0],
+        'support_levels': [level for level in map(_scalar, result['support'][0]) if level is not None],
+        'resistance_levels': [level for level in map(_scalar, result['resistance'][0]) if level is not None],
+        'sma': {window: _scalar(result[f"sma_{window}"][0, -1]) for window in SMA_WINDOWS},
+        'atr': _scalar(result['atr'][0, -1]),
+        'price_change_percent': _scalar(result['price_change_percent'][0, -1]),
+        'price_breach': bool(result['price_breach'][0, -1]),
+        'volume_breach': bool(result['volume_breach'][0, -1]),
+        'price_breaches': int(result['price_breach'][0].sum()),
+        'volume_breaches': int(result['volume_breach'][0].sum())
+    }
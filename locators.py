@@ -0,0 +1,137 @@
+import threading
+from selenium.common.exceptions import NoSuchElementException
+from config import CHART_SELECTORS
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+HOLDING_ROW_CLASS = 'holding-row'
+ROW_ATTRIBUTE = 'data-kotak-row'
+
+# JS helper shared by the scripts that take selector candidates: pick(candidates) returns
+# [id, elements] for the first [id, selector] pair that matches anything, or [null, []]
+PICK_JS = """
+function pick(candidates) {
+    for (var i = 0; i < candidates.length; i++) {
+        var selector = candidates[i][1], found = [];
+        if (selector.charAt(0) === '/' || selector.charAt(0) === '(') {
+            var r = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var j = 0; j < r.snapshotLength; j++) { found.push(r.snapshotItem(j)); }
+        } else {
+            found = Array.prototype.slice.call(document.querySelectorAll(selector));
+        }
+        if (found.length) { return [candidates[i][0], found]; }
+    }
+    return [null, []];
+}
+"""
+
+FIND_SCRIPT = PICK_JS + "return pick(arguments[0]);"
+
+# Stamps every holding row with its index and returns the rows' symbols in order
+TAG_ROWS_SCRIPT = """
+var rows = document.getElementsByClassName(arguments[0]);
+var out = [];
+for (var i = 0; i < rows.length; i++) {
+    rows[i].setAttribute(arguments[1], i);
+    var el = rows[i].getElementsByClassName(arguments[2])[0];
+    out.push(el ? el.innerText.trim() : null);
+}
+return out;
+"""
+
+# The symbol cell of a stamped row, only if it still holds exactly that symbol
+LOCATE_ROW_SCRIPT = """
+var row = document.querySelector('[' + arguments[0] + '="' + arguments[1] + '"]');
+var el = row ? row.getElementsByClassName(arguments[2])[0] : null;
+return el && el.innerText.trim().toUpperCase() === arguments[3] ? el : null;
+"""
+
+
+class RowIndex:
+    """Symbol -> holding row index, built from the holdings scan and rebuilt only when a lookup misses.
+
+    Rows are matched on the exact symbol text, so TCS never resolves to TCSL and quotes in a symbol
+    need no escaping.
+    """
+
+    def __init__(self, symbol_class='symbol'):
+        self.symbol_class = symbol_class
+        self.logger = logger
+        self._rows = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def update(self, symbols):
+        """Index `symbols` by row position (the order the holdings scan read them in)."""
+        rows = {}
+        for index, symbol in enumerate(symbols):
+            if symbol:
+                rows.setdefault(symbol.strip().upper(), index)
+        with self._lock:
+            self._rows = rows
+
+    def refresh(self, driver):
+        """Re-stamp the rows on the current page and rebuild the index from them."""
+        symbols = driver.execute_script(TAG_ROWS_SCRIPT, HOLDING_ROW_CLASS, ROW_ATTRIBUTE, self.symbol_class) or []
+        self.update(symbols)
+        self.logger.debug("Indexed %d holding rows", len(symbols))
+
+    def locate(self, driver, symbol):
+        """The symbol cell of `symbol`'s row; re-indexes once if the table changed since the last scan."""
+        key = symbol.strip().upper()
+        for attempt in range(2):
+            row = self._rows.get(key)
+            if row is not None:
+                element = driver.execute_script(LOCATE_ROW_SCRIPT, ROW_ATTRIBUTE, row, self.symbol_class, key)
+                if element:
+                    return element
+            if attempt == 0:
+                self.logger.debug("Holding row for %s not where indexed, re-indexing", symbol)
+                self.refresh(driver)
+        raise NoSuchElementException(f"No holding row for {symbol}")
+
+
+class SelectorRegistry:
+    """Ordered fallback selectors per logical element; the first one that matches is remembered.
+
+    Later lookups try the remembered selector first and only fall through to the others if it stops
+    matching, so failing selectors are not retried on every call.
+    """
+
+    def __init__(self, selectors=CHART_SELECTORS):
+        self.selectors = selectors
+        self.logger = logger
+        self._winners = {}
+        self._lock = threading.Lock()
+
+    def candidates(self, name):
+        """[id, selector] pairs for `name`, the remembered winner first; pass to scripts built on PICK_JS."""
+        selectors = self.selectors[name]
+        winner = self._winners.get(name)
+        order = list(range(len(selectors)))
+        if winner is not None:
+            order.remove(winner)
+            order.insert(0, winner)
+        return [[index, selectors[index]] for index in order]
+
+    def remember(self, name, index):
+        """Record that selector `index` matched for `name`."""
+        if index is None or self._winners.get(name) == index:
+            return
+        with self._lock:
+            self._winners[name] = index
+        self.logger.debug("Selector for %s: %s", name, self.selectors[name][index])
+
+    def find_all(self, driver, name):
+        """Every element matched by the first working selector for `name` (one round trip)."""
+        index, elements = driver.execute_script(FIND_SCRIPT, self.candidates(name))
+        if index is None:
+            raise NoSuchElementException(f"No selector for {name} matched: {', '.join(self.selectors[name])}")
+        self.remember(name, index)
+        return elements
+
+    def find(self, driver, name):
+        return self.find_all(driver, name)[0]
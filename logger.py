@@ -1,16 +1,133 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
 import sys
-from config import LOG_LEVEL, LOG_FILE
-
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
+import threading
+from config import (LOG_LEVEL, LOG_FILE, LOG_FORMAT, LOG_ASYNC, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_ROW_HEAD,
+                    LOG_ROW_SAMPLE_EVERY)
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener = None
+_configured = False
+_configure_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; `extra=` fields are included as keys."""
+    RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in self.RESERVED})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Enqueues a copy of the record with its arguments merged into the message.
+
+    Formatting, including any traceback, is left to the listener thread, so `exc_info` reaches the
+    formatters (the stdlib `prepare` formats on the caller's thread and drops it).
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(level=LOG_LEVEL, log_file=LOG_FILE, log_format=LOG_FORMAT, use_queue=LOG_ASYNC):
+    """Install the file and console handlers once.
+
+    With `use_queue` callers only enqueue records; formatting and I/O happen on a listener thread
+    that is flushed at exit.
+    """
+    global _configured
+    # Held until the real handlers have replaced the bootstrap one, so a record arriving on another
+    # thread waits here instead of being passed back to the bootstrap handler
+    with _configure_lock:
+        if _configured:
+            return
+        _install_handlers(level, log_file, log_format, use_queue)
+        _configured = True
+
+
+def _install_handlers(level, log_file, log_format, use_queue):
+    global _listener
+    root = logging.getLogger()
+    formatter = JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT)
+    handlers = [
+        logging.handlers.RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                             encoding='utf-8'),
         logging.StreamHandler(sys.stdout)
     ]
-)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    root.setLevel(getattr(logging, level))
+    if use_queue:
+        records = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        handlers = [_QueueHandler(records)]
+    # A new list, not in-place edits: the record that triggered configuration may be mid-dispatch
+    root.handlers = [handler for handler in root.handlers if handler is not _bootstrap] + handlers
+
+
+def stop_logging():
+    """Write out queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_rows(logger, level, message, rows, args, head=LOG_ROW_HEAD, every=LOG_ROW_SAMPLE_EVERY):
+    """Log `message % args(row)` for a sample of `rows`: the first `head`, then one in every `every`.
+
+    Nothing is formatted, or iterated, when `level` is disabled.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    skipped = 0
+    for index, row in enumerate(rows):
+        if index < head or (every and (index - head) % every == every - 1):
+            logger.log(level, message, *args(row))
+        else:
+            skipped += 1
+    if skipped:
+        logger.log(level, "... %d more rows not logged", skipped)
+
+
+class _ConfigureOnFirstRecord(logging.Handler):
+    """Stands in until the first record is emitted, then installs the real handlers and passes it on."""
+
+    def handle(self, record):
+        configure_logging()
+        # The bootstrap handler is gone from the root logger by now, so this reaches the real handlers
+        logging.getLogger().callHandlers(record)
+        return True
+
+    def emit(self, record):
+        pass
+
+
+# Importing only sets the level: the log file and the listener thread appear with the first record
+logging.getLogger().setLevel(getattr(logging, LOG_LEVEL))
+_bootstrap = _ConfigureOnFirstRecord()
+logging.getLogger().addHandler(_bootstrap)
 
 def get_logger(name):
     """Get a logger instance for the given module name."""
@@ -1,116 +1,122 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
-import time
 from datetime import datetime
 import os
-from config import KOTAK_LOGIN_URL, KOTAK_PHONE_NUMBER, KOTAK_PASSWORD, BROWSER, IMPLICIT_WAIT, EXPLICIT_WAIT, HEADLESS
+import config
+from config import (BROWSER, IMPLICIT_WAIT, EXPLICIT_WAIT, NETWORK_CAPTURE, SESSION_CACHE_ENABLED,
+                    SESSION_PROBE_TIMEOUT, LEAN_MODE)
+from drivers import DriverManifest, resolve_driver, apply_lean_options, block_urls, lean_blocked_patterns
 from logger import get_logger
+from profiler import profiler
+from session_cache import SessionCache, apply_session
+from waits import WaitEngine
 
 logger = get_logger(__name__)
 
 class KotakLogin:
-    def __init__(self):
+    def __init__(self, lean=LEAN_MODE, keep_chart_assets=True, phone_number=None, password=None, profile_dir=None):
+        """Credentials default to the ones in config; `profile_dir` gives the browser its own profile."""
         self.driver = None
+        self.phone_number = phone_number
+        self.password = password
+        self.profile_dir = profile_dir
+        self.lean = lean
+        self.keep_chart_assets = keep_chart_assets
+        self.waits = None
+        self.session_cache = SessionCache()
+        self.driver_manifest = DriverManifest()
         self.logger = logger
     
+    @profiler.timed('login.setup_driver')
     def setup_driver(self):
         """Initialize Selenium WebDriver."""
         try:
-            if BROWSER.lower() == 'chrome':
-                import shutil
-                import os
-                options = webdriver.ChromeOptions()
-                if HEADLESS:
+            browser = BROWSER.lower()
+            # Only the chosen browser's backend is imported, and driver binaries come from the manifest
+            if browser == 'chrome':
+                from selenium.webdriver.chrome.options import Options
+                from selenium.webdriver.chrome.service import Service
+                from selenium.webdriver.chrome.webdriver import WebDriver
+                options = Options()
+                if config.HEADLESS:
                     options.add_argument('--headless')
                 options.add_argument('--no-sandbox')
                 options.add_argument('--disable-dev-shm-usage')
-
-                # Prefer a system-installed chromedriver (Homebrew) when available
-                system_paths = [
-                    '/opt/homebrew/bin/chromedriver',
-                    '/usr/local/bin/chromedriver'
-                ]
-                chromedriver_path = None
-
-                for p in system_paths:
-                    if os.path.exists(p) and os.access(p, os.X_OK):
-                        chromedriver_path = p
-                        break
-
-                # Fallback to chromedriver on PATH
-                if not chromedriver_path:
-                    chromedriver_path = shutil.which('chromedriver')
-
-                if chromedriver_path:
-                    self.logger.info(f"Using system chromedriver at {chromedriver_path}")
-                    try:
-                        self.driver = webdriver.Chrome(
-                            service=Service(chromedriver_path),
-                            options=options
-                        )
-                    except Exception as e:
-                        self.logger.warning(f"System chromedriver failed to start: {e}. Falling back to webdriver-manager.")
-                        driver_path = ChromeDriverManager().install()
-                        self.driver = webdriver.Chrome(
-                            service=Service(driver_path),
-                            options=options
-                        )
-                else:
-                    # Fallback to webdriver-manager
-                    self.logger.info("No system chromedriver found; using webdriver-manager to download one")
-                    driver_path = ChromeDriverManager().install()
-                    self.driver = webdriver.Chrome(
-                        service=Service(driver_path),
-                        options=options
-                    )
-            elif BROWSER.lower() == 'safari':
+                if self.profile_dir:
+                    options.add_argument(f'--user-data-dir={os.path.abspath(self.profile_dir)}')
+                if NETWORK_CAPTURE:
+                    # Performance log carries the Network.* events NetworkCapture reads
+                    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+                if self.lean:
+                    apply_lean_options(browser, options, self.keep_chart_assets)
+                self.driver = self._start(browser, WebDriver, Service, options)
+                if self.lean:
+                    block_urls(self.driver, lean_blocked_patterns(self.keep_chart_assets))
+            elif browser == 'safari':
                 # Use Safari's built-in safaridriver. Ensure Remote Automation is enabled in Safari.
-                options = webdriver.SafariOptions()
-                if HEADLESS:
+                from selenium.webdriver.safari.webdriver import WebDriver
+                if config.HEADLESS:
                     self.logger.warning("Safari does not support headless mode via safaridriver; continuing without headless.")
+                if self.lean:
+                    self.logger.warning("Lean mode is not supported with Safari; loading pages normally.")
+                if self.profile_dir:
+                    self.logger.warning("Safari cannot use a separate profile; sharing the default one.")
                 try:
-                    self.driver = webdriver.Safari()
+                    self.driver = WebDriver()
                     self.logger.info("WebDriver initialized with Safari")
                 except Exception as e:
                     self.logger.error("Failed to initialize Safari WebDriver. Ensure 'Allow Remote Automation' is enabled in Safari > Develop, and run 'safaridriver --enable' if necessary.")
                     raise
-            elif BROWSER.lower() == 'firefox':
-                options = webdriver.FirefoxOptions()
-                if HEADLESS:
+            elif browser == 'firefox':
+                from selenium.webdriver.firefox.options import Options
+                from selenium.webdriver.firefox.service import Service
+                from selenium.webdriver.firefox.webdriver import WebDriver
+                options = Options()
+                if config.HEADLESS:
                     options.add_argument('--headless')
-                self.driver = webdriver.Firefox(
-                    service=Service(GeckoDriverManager().install()),
-                    options=options
-                )
+                if NETWORK_CAPTURE:
+                    self.logger.warning("Network capture is Chrome-only; Firefox will scrape the DOM.")
+                if self.profile_dir:
+                    os.makedirs(self.profile_dir, exist_ok=True)
+                    options.add_argument('-profile')
+                    options.add_argument(os.path.abspath(self.profile_dir))
+                if self.lean:
+                    apply_lean_options(browser, options, self.keep_chart_assets)
+                self.driver = self._start(browser, WebDriver, Service, options)
             else:
                 raise ValueError(f"Unsupported browser: {BROWSER}")
             
+            profiler.instrument(self.driver)
             self.driver.implicitly_wait(IMPLICIT_WAIT)
-            self.logger.info(f"WebDriver initialized with {BROWSER}")
+            self.waits = WaitEngine(self.driver)
+            self.logger.info("WebDriver initialized with %s", BROWSER)
             return self.driver
         except Exception as e:
-            self.logger.error(f"Failed to initialize WebDriver: {str(e)}")
+            self.logger.error("Failed to initialize WebDriver: %s", e)
             raise
     
+    def _start(self, browser, webdriver_class, service_class, options):
+        """Start the driver from the resolved binary, downloading a fresh one if that binary fails to start."""
+        driver_path = resolve_driver(browser, self.driver_manifest)
+        try:
+            return webdriver_class(service=service_class(driver_path), options=options)
+        except Exception as e:
+            self.logger.warning("%s failed to start: %s. Falling back to webdriver-manager.", driver_path, e)
+            driver_path = resolve_driver(browser, self.driver_manifest, download=True)
+            return webdriver_class(service=service_class(driver_path), options=options)
+    
+    @profiler.timed('login.login')
     def login(self):
         """Log into Kotak Securities."""
         try:
-            self.logger.info(f"Navigating to {KOTAK_LOGIN_URL}")
-            self.driver.get(KOTAK_LOGIN_URL)
-            time.sleep(2)
+            self.logger.info("Navigating to %s", config.KOTAK_LOGIN_URL)
+            self.driver.get(config.KOTAK_LOGIN_URL)
             
             # Wait for login page to load
             try:
-                WebDriverWait(self.driver, EXPLICIT_WAIT).until(
-                    EC.presence_of_element_located((By.NAME, 'uid'))
-                )
+                self.waits.until(EC.element_to_be_clickable((By.NAME, 'uid')), 'login form')
             except Exception as e:
-                self.logger.error(f"Form field 'uid' not found within {EXPLICIT_WAIT}s: {e}")
+                self.logger.error("Form field 'uid' not found within %ss: %s", EXPLICIT_WAIT, e)
                 self.logger.info("Current page URL: " + self.driver.current_url)
                 self.logger.info("Page title: " + self.driver.title)
                 
@@ -123,45 +129,65 @@ class KotakLogin:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 screenshot_path = os.path.join(screenshots_dir, f"login_debug_{timestamp}.png")
                 self.driver.save_screenshot(screenshot_path)
-                self.logger.info(f"Screenshot saved to {screenshot_path}")
+                self.logger.info("Screenshot saved to %s", screenshot_path)
                 
                 # Log page source snippet
                 page_source = self.driver.page_source
                 if page_source:
-                    self.logger.info(f"Page source (first 500 chars): {page_source[:500]}")
+                    self.logger.info("Page source (first 500 chars): %s", page_source[:500])
                 raise
             
             # Enter phone number
             username_field = self.driver.find_element(By.NAME, 'uid')
-            username_field.send_keys(KOTAK_PHONE_NUMBER)
+            username_field.send_keys(self.phone_number or config.KOTAK_PHONE_NUMBER)
             self.logger.info("Phone number entered")
             
-            time.sleep(1)
-            
             # Enter password
             password_field = self.driver.find_element(By.NAME, 'pwd')
-            password_field.send_keys(KOTAK_PASSWORD)
+            password_field.send_keys(self.password or config.KOTAK_PASSWORD)
             self.logger.info("Password entered")
             
-            time.sleep(1)
-            
             # Click login button
             login_button = self.driver.find_element(By.XPATH, "//button[contains(text(), 'Login') or contains(text(), 'login')]")
             login_button.click()
             self.logger.info("Login button clicked")
             
             # Wait for dashboard to load
-            time.sleep(3)
-            WebDriverWait(self.driver, EXPLICIT_WAIT).until(
-                EC.presence_of_element_located((By.CLASS_NAME, 'dashboard'))
-            )
+            self.waits.until(EC.presence_of_element_located((By.CLASS_NAME, 'dashboard')), 'dashboard')
             
             self.logger.info("Successfully logged into Kotak Securities")
+            if SESSION_CACHE_ENABLED:
+                self.session_cache.save(self.driver)
             return True
         except Exception as e:
-            self.logger.error(f"Login failed: {str(e)}")
+            self.logger.error("Login failed: %s", e)
             raise
     
+    @profiler.timed('login.restore_session')
+    def restore_session(self):
+        """Reuse a cached session and land on the holdings page; False means a full login is needed."""
+        if not SESSION_CACHE_ENABLED:
+            return False
+        state = self.session_cache.load()
+        if not state:
+            return False
+        try:
+            self.logger.info("Restoring cached session")
+            apply_session(self.driver, state, config.KOTAK_LOGIN_URL)
+            self.driver.get(config.KOTAK_PORTFOLIO_URL)
+            # Cheap validity probe: an expired session is redirected away from the holdings page
+            self.waits.until(
+                lambda driver: driver.execute_script("return document.getElementsByClassName('holdings').length > 0;"),
+                'session probe',
+                timeout=SESSION_PROBE_TIMEOUT
+            )
+            self.logger.info("Cached session is valid, skipping login")
+            return True
+        except Exception as e:
+            self.logger.info("Cached session rejected, falling back to full login: %s", e)
+            self.session_cache.clear()
+            return False
+    
     def close(self):
         """Close the WebDriver."""
         if self.driver:
@@ -1,35 +1,51 @@
-import json
+import argparse
+import logging
 from datetime import datetime
 from login import KotakLogin
 from portfolio import PortfolioAnalyzer
 from chart_analyzer import ChartAnalyzer
-from logger import get_logger
+from chart_pool import ChartWorkerPool
+from config import (CHART_WORKERS, CHART_TIMEFRAMES, CANDLE_STORE_ENABLED, REPORT_EXPORT_COLUMNAR, ANALYSIS_RETRIES,
+                    ANALYSIS_RETRY_BACKOFF, PROFILE_ENABLED, SERVICE_PORT, RECORD_ENABLED)
+from candle_store import CandleStore
+from session_cache import capture_session
+from network_capture import capture_for
+from monitor import PortfolioMonitor
+from service import serve
+from accounts import AccountRunner, load_accounts
+from screenshots import ScreenshotPipeline
+from report_writer import ReportWriter, read_records, export_columnar
+from checkpoint import RunCheckpoint
+from recorder import SessionRecorder
+from profiler import profiler
+from logger import get_logger, log_rows
 
 logger = get_logger(__name__)
 
 class KotakSecuritiesAnalyzer:
-    def __init__(self):
-        self.login = KotakLogin()
+    def __init__(self, profile_summary=False, login=None, timeframes=None, record=RECORD_ENABLED):
+        self.login = login or KotakLogin()
+        self.timeframes = timeframes or CHART_TIMEFRAMES
+        self.profile_summary = profile_summary
         self.portfolio_analyzer = None
         self.chart_analyzer = None
-        self.analysis_results = []
+        self.capture = None
+        self.candle_store = CandleStore() if CANDLE_STORE_ENABLED else None
+        self.screenshots = ScreenshotPipeline()
+        self.report = None
+        self.checkpoint = RunCheckpoint()
+        self.recorder = SessionRecorder() if record else None
     
-    def run(self, symbols=None):
-        """Main execution method."""
+    def run(self, symbols=None, resume=True):
+        """Main execution method; an interrupted run for the same symbols is resumed unless `resume` is False."""
         try:
             logger.info("=" * 60)
             logger.info("Starting Kotak Securities Analysis")
             logger.info("=" * 60)
+            profiler.reset()
             
-            # Step 1: Setup and Login
-            logger.info("\n[STEP 1] Setting up WebDriver and logging in...")
-            self.login.setup_driver()
-            self.login.login()
-            
-            # Step 2: Navigate to Portfolio
-            logger.info("\n[STEP 2] Navigating to portfolio...")
-            self.portfolio_analyzer = PortfolioAnalyzer(self.login.driver)
-            self.portfolio_analyzer.navigate_to_portfolio()
+            completed = self.open_report(symbols, resume)
+            self.start_session()
             
             # Step 3: Get Stock Positions
             logger.info("\n[STEP 3] Fetching stock positions...")
@@ -39,108 +55,257 @@ class KotakSecuritiesAnalyzer:
                 logger.warning("No positions found in portfolio")
                 return
             
-            logger.info(f"\nFound {len(positions)} positions in portfolio:")
-            for pos in positions:
-                logger.info(f"  - {pos['symbol']}: {pos['quantity']} units @ {pos['current_price']}")
+            logger.info("\nFound %d positions in portfolio:", len(positions))
+            log_rows(logger, logging.INFO, "  - %s: %s units @ %s", positions,
+                     lambda pos: (pos.symbol, pos.quantity, pos.current_price))
+            totals = self.portfolio_analyzer.book.frame().totals()
+            logger.info("Portfolio value %s, P&L %s (%s%%)", totals['market_value'], totals['pnl'],
+                        totals['pnl_percent'])
             
             # Step 4: Analyze Charts for Each Position
             logger.info("\n[STEP 4] Opening and analyzing candlestick charts...")
-            self.chart_analyzer = ChartAnalyzer(self.login.driver)
-            
-            stocks_to_analyze = symbols if symbols else [pos['symbol'] for pos in positions[:3]]  # Limit to 3 for testing
+            stocks_to_analyze = symbols if symbols else [pos.symbol for pos in positions[:3]]  # Limit to 3 for testing
             
+            jobs = []
             for symbol in stocks_to_analyze:
-                try:
-                    logger.info(f"\n--- Analyzing {symbol} ---")
-                    position = self.portfolio_analyzer.get_position_by_symbol(symbol)
-                    
-                    if not position:
-                        logger.warning(f"Position not found for {symbol}, skipping")
-                        continue
-                    
-                    # Open chart
-                    self.chart_analyzer.open_chart(symbol)
-                    
-                    # Set timeframe to hourly
-                    self.chart_analyzer.set_timeframe('1H')
-                    
-                    # Analyze movement
-                    analysis = self.chart_analyzer.analyze_current_movement()
-                    
-                    # Take screenshot
-                    screenshot_file = f"chart_{symbol}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-                    self.chart_analyzer.take_screenshot(screenshot_file)
-                    
-                    # Close chart
-                    self.chart_analyzer.close_chart()
-                    
-                    # Store results
-                    result = {
-                        'symbol': symbol,
-                        'position': position,
-                        'analysis': analysis,
-                        'screenshot': screenshot_file,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    self.analysis_results.append(result)
-                    
-                    logger.info(f"✓ Analysis complete for {symbol}")
-                    
-                except Exception as e:
-                    logger.error(f"Failed to analyze {symbol}: {str(e)}")
+                position = self.portfolio_analyzer.get_position_by_symbol(symbol)
+                if not position:
+                    logger.warning("Position not found for %s, skipping", symbol)
+                    continue
+                if symbol.upper() in completed:
+                    logger.info("%s already analyzed in the interrupted run, skipping", symbol)
                     continue
+                jobs.append((symbol, position))
+            
+            if CHART_WORKERS > 1 and len(jobs) > 1:
+                failed = self.analyze_in_pool(jobs)
+            else:
+                failed = 0
+                for symbol, position in jobs:
+                    try:
+                        self.record_result(self.analyze_with_retry(self.chart_analyzer, symbol, position))
+                    except Exception as e:
+                        logger.error("Failed to analyze %s: %s", symbol, e)
+                        failed += 1
+                        continue
             
             # Step 5: Generate Report
             logger.info("\n[STEP 5] Generating analysis report...")
             self.generate_report()
+            if failed:
+                logger.warning("%s symbols failed; run again to retry only those", failed)
+            else:
+                self.checkpoint.clear()
             
             logger.info("\n" + "=" * 60)
             logger.info("Analysis Complete")
             logger.info("=" * 60)
             
         except Exception as e:
-            logger.error(f"Fatal error in execution: {str(e)}")
+            logger.error("Fatal error in execution: %s", e)
             raise
         finally:
             # Cleanup
+            self.screenshots.close()
+            if self.report:
+                self.report.close()
             if self.login:
                 self.login.close()
+            if self.recorder:
+                self.recorder.close()
+            self.finish_profile()
+    
+    def open_report(self, symbols, resume=True):
+        """Reopen an interrupted run's report, or start a new one; returns the symbols already done."""
+        resumed = self.checkpoint.resume(symbols) if resume else None
+        if resumed:
+            report_path, completed = resumed
+            self.report = ReportWriter(report_path)
+            return completed
+        self.report = ReportWriter()
+        self.checkpoint.start(symbols, self.report.path)
+        return set()
+    
+    def start_session(self):
+        """Start the browser, reuse the cached session or log in, and land on the holdings page."""
+        # Step 1: Setup and Login
+        logger.info("\n[STEP 1] Setting up WebDriver and logging in...")
+        self.login.setup_driver()
+        self.capture = capture_for(self.login.driver)
+        restored = self.login.restore_session()
+        if not restored:
+            self.login.login()
+        
+        # Step 2: Navigate to Portfolio (a restored session is already there)
+        logger.info("\n[STEP 2] Navigating to portfolio...")
+        self.portfolio_analyzer = PortfolioAnalyzer(self.login.driver, capture=self.capture, recorder=self.recorder)
+        if not restored:
+            self.portfolio_analyzer.navigate_to_portfolio()
+        self.chart_analyzer = ChartAnalyzer(self.login.driver, capture=self.capture, store=self.candle_store,
+                                            screenshots=self.screenshots,
+                                            row_index=self.portfolio_analyzer.row_index, recorder=self.recorder)
+    
+    def restart_session(self):
+        """Recover from a broken browser or an expired session by starting over."""
+        try:
+            self.login.close()
+        except Exception:
+            pass
+        self.login.driver = None
+        self.start_session()
+    
+    @profiler.timed('main.analyze_symbol')
+    def analyze_symbol(self, chart_analyzer, symbol, position):
+        """Open, analyze, capture and close the chart for one symbol."""
+        logger.info("\n--- Analyzing %s ---", symbol)
+        
+        # Discard wait timings left over from a failed symbol
+        chart_analyzer.waits.drain()
+        
+        # Open chart
+        chart_analyzer.open_chart(symbol)
+        
+        # Analyze and capture every timeframe in this one chart open
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        multi = len(self.timeframes) > 1
+        screenshot_name = f"chart_{symbol}_{{timeframe}}_{timestamp}.png" if multi else \
+            f"chart_{symbol}_{timestamp}.png"
+        captures = chart_analyzer.analyze_timeframes(self.timeframes, screenshot_name)
+        
+        # Close chart
+        chart_analyzer.close_chart()
+        
+        primary = captures[self.timeframes[0]]
+        result = {
+            'symbol': symbol,
+            'position': position.to_dict(),
+            'timeframe': primary['timeframe'],
+            'analysis': primary['analysis'],
+            'screenshot': primary['screenshot'],
+            'waits': chart_analyzer.waits.drain(),
+            'timestamp': datetime.now().isoformat()
+        }
+        if multi:
+            result['timeframes'] = captures
+        
+        waited = sum(w['waited'] for w in result['waits'])
+        logger.info("✓ Analysis complete for %s (waited %.2fs)", symbol, waited)
+        return result
+    
+    def analyze_with_retry(self, chart_analyzer, symbol, position, portfolio_analyzer=None):
+        """analyze_symbol, retried ANALYSIS_RETRIES times with exponential backoff from the holdings page.
+
+        `portfolio_analyzer` returns the chart's browser to the holdings page; the session's own by default.
+        """
+        for attempt in range(ANALYSIS_RETRIES + 1):
+            try:
+                return self.analyze_symbol(chart_analyzer, symbol, position)
+            except Exception as e:
+                if attempt == ANALYSIS_RETRIES:
+                    raise
+                delay = ANALYSIS_RETRY_BACKOFF * 2 ** attempt
+                logger.warning("Attempt %s for %s failed: %s; retrying in %.1fs", attempt + 1, symbol, e, delay)
+            profiler.sleep(delay)
+            try:
+                (portfolio_analyzer or self.portfolio_analyzer).return_to_holdings()
+            except Exception as e:
+                logger.warning("Could not return to the holdings page before retrying %s: %s", symbol, e)
+    
+    def analyze_in_pool(self, jobs):
+        """Analyze charts concurrently in worker browsers that share this logged-in session; returns failures."""
+        pool = ChartWorkerPool(capture_session(self.login.driver), workers=min(CHART_WORKERS, len(jobs)),
+                               store=self.candle_store, screenshots=self.screenshots, recorder=self.recorder)
+        try:
+            results = pool.map(self.analyze_with_retry, jobs, on_result=self.record_result)
+        finally:
+            pool.close()
+        return sum(1 for result in results if result is None)
+    
+    def record_result(self, result):
+        """Append one result to this run's NDJSON report as soon as it is produced."""
+        if self.report is None:
+            self.report = ReportWriter()
+            logger.info("Streaming results to %s", self.report.path)
+        self.report.write(result)
+    
+    def finish_profile(self):
+        """Write the run profile and, if requested, print where the time went."""
+        if not PROFILE_ENABLED:
+            return
+        try:
+            profiler.export()
+            if self.profile_summary:
+                profiler.print_summary()
+        except Exception as e:
+            logger.error("Failed to write profile: %s", e)
     
     def generate_report(self):
-        """Generate and save analysis report."""
+        """Close the streamed report and print a summary read back from it."""
         try:
-            report_file = f"analysis_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            
-            report = {
-                'timestamp': datetime.now().isoformat(),
-                'total_symbols_analyzed': len(self.analysis_results),
-                'results': self.analysis_results
-            }
-            
-            with open(report_file, 'w') as f:
-                json.dump(report, f, indent=2)
-            
-            logger.info(f"Report saved to {report_file}")
+            if self.report is None:
+                logger.warning("No results to report")
+                return
+            self.report.close()
+            logger.info("Report saved to %s (%s results)", self.report.path, self.report.count)
+            if REPORT_EXPORT_COLUMNAR:
+                export_columnar(self.report.path)
             
             # Print summary
             print("\n" + "=" * 60)
             print("ANALYSIS SUMMARY")
             print("=" * 60)
-            for result in self.analysis_results:
+            for result in read_records(self.report.path):
                 print(f"\n{result['symbol']}:")
                 print(f"  Position: {result['position']['quantity']} units @ {result['position']['current_price']}")
                 print(f"  Trend: {result['analysis'].get('trend', 'N/A')}")
+                for timeframe, capture in result.get('timeframes', {}).items():
+                    if capture['analysis'] is None:
+                        print(f"    {timeframe}: {capture['error']}")
+                        continue
+                    print(f"    {timeframe}: {capture['analysis'].get('trend', 'N/A')}, "
+                          f"close {capture['analysis'].get('close', 'N/A')}")
                 print(f"  Current Price: {result['analysis'].get('current_price', 'N/A')}")
+                print(f"  Waited: {sum(w['waited'] for w in result.get('waits', [])):.2f}s")
                 print(f"  Chart Screenshot: {result['screenshot']}")
             print("=" * 60)
             
         except Exception as e:
-            logger.error(f"Failed to generate report: {str(e)}")
-
+            logger.error("Failed to generate report: %s", e)
 
 if __name__ == '__main__':
-    analyzer = KotakSecuritiesAnalyzer()
+    parser = argparse.ArgumentParser(description='Kotak Securities portfolio and chart analyzer')
+    parser.add_argument('symbols', nargs='*', help='symbols to analyze (default: first positions)')
+    parser.add_argument('--monitor', action='store_true',
+                        help='keep the session open and re-analyze symbols that move past PRICE_CHANGE_THRESHOLD')
+    parser.add_argument('--cycles', type=int, default=None, help='stop monitoring after this many polls')
+    parser.add_argument('--fresh', action='store_true', help='ignore the checkpoint of an interrupted run')
+    parser.add_argument('--profile', action='store_true', help='print step and driver command timings at the end')
+    parser.add_argument('--timeframes', help='comma-separated timeframes captured per chart, e.g. 15m,1H,1D '
+                                              '(default: CHART_TIMEFRAMES)')
+    parser.add_argument('--record', action='store_true',
+                        help='save the holdings and chart data analyzed, for offline re-analysis with replay.py')
+    parser.add_argument('--serve', action='store_true',
+                        help='keep a logged-in browser warm and serve analyses over localhost HTTP')
+    parser.add_argument('--port', type=int, default=None, help='port for --serve (default: SERVICE_PORT)')
+    parser.add_argument('--accounts', metavar='FILE',
+                        help='analyze every account in FILE (see ACCOUNTS_FILE), one worker process each')
+    parser.add_argument('--account-workers', type=int, default=None,
+                        help='accounts to run at once (default: limited by CPU, memory and ACCOUNT_MAX_WORKERS)')
+    args = parser.parse_args()
+    
+    if args.accounts:
+        AccountRunner(load_accounts(args.accounts), workers=args.account_workers).run(symbols=args.symbols or None)
+        raise SystemExit
+    
+    timeframes = [timeframe.strip() for timeframe in args.timeframes.split(',') if timeframe.strip()] \
+        if args.timeframes else None
+    analyzer = KotakSecuritiesAnalyzer(profile_summary=args.profile, timeframes=timeframes,
+                                       record=args.record or RECORD_ENABLED)
     
-    # Run analysis for all positions or specific symbols
-    # analyzer.run(symbols=['RELIANCE', 'TCS', 'INFY'])  # Analyze specific stocks
-    analyzer.run()  # Analyze all positions
+    if args.serve:
+        serve(analyzer, port=args.port or SERVICE_PORT)
+    elif args.monitor:
+        PortfolioMonitor(analyzer).run(cycles=args.cycles)
+    else:
+        # Run analysis for all positions or specific symbols, e.g. python main.py RELIANCE TCS INFY
+        analyzer.run(symbols=args.symbols or None, resume=not args.fresh)
@@ -0,0 +1,115 @@
+import heapq
+import time
+from datetime import datetime
+from config import PRICE_CHANGE_THRESHOLD, MONITOR_POLL_INTERVAL, MONITOR_MAX_ANALYSES_PER_CYCLE
+from logger import get_logger
+from profiler import profiler
+
+logger = get_logger(__name__)
+
+
+class PortfolioMonitor:
+    """Keeps one session open, re-polls holdings and re-analyzes only the symbols that moved."""
+
+    def __init__(self, analyzer, interval=MONITOR_POLL_INTERVAL, threshold=PRICE_CHANGE_THRESHOLD,
+                 max_analyses=MONITOR_MAX_ANALYSES_PER_CYCLE):
+        self.analyzer = analyzer
+        self.interval = interval
+        self.threshold = threshold
+        self.max_analyses = max_analyses
+        self.logger = logger
+        # Price each symbol was last analyzed at (or first seen at); moves are measured from here so a
+        # mover skipped by the per-cycle cap stays queued and slow drifts still trigger eventually
+        self.reference_prices = {}
+        self.last_pnl = {}
+        self.pnl_changes = {}
+
+    def run(self, cycles=None):
+        """Monitor until interrupted, or for `cycles` polls."""
+        analyzer = self.analyzer
+        cycle = 0
+        profiler.reset()
+        try:
+            analyzer.start_session()
+            while cycles is None or cycle < cycles:
+                cycle += 1
+                started = time.monotonic()
+                self.logger.info("\n[MONITOR] Cycle %s at %s", cycle, datetime.now().isoformat())
+                try:
+                    self.run_cycle(first=cycle == 1)
+                except Exception as e:
+                    self.logger.error("Monitor cycle %s failed: %s", cycle, e)
+                    try:
+                        analyzer.restart_session()
+                    except Exception as e:
+                        self.logger.error("Could not restart the session, retrying next cycle: %s", e)
+                if cycles is not None and cycle >= cycles:
+                    break
+                profiler.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            self.logger.info("Monitor stopped")
+        finally:
+            analyzer.screenshots.close()
+            if analyzer.report:
+                analyzer.generate_report()
+            analyzer.login.close()
+            if analyzer.recorder:
+                analyzer.recorder.close()
+            analyzer.finish_profile()
+
+    def run_cycle(self, first=False):
+        """Refresh holdings, queue the biggest movers and analyze up to the per-cycle cap."""
+        analyzer = self.analyzer
+        if not first:
+            analyzer.portfolio_analyzer.navigate_to_portfolio()
+        positions = analyzer.portfolio_analyzer.get_stock_positions()
+        movers = self.diff(positions)
+        if not movers:
+            self.logger.info("No position moved %s%% or more", self.threshold)
+            return []
+
+        queue = [(-abs(move), symbol, move, position) for symbol, move, position in movers]
+        heapq.heapify(queue)
+        results = []
+        while queue and len(results) < self.max_analyses:
+            _, symbol, move, position = heapq.heappop(queue)
+            self.logger.info("%s moved %+.2f%%, re-analyzing", symbol, move)
+            try:
+                result = analyzer.analyze_symbol(analyzer.chart_analyzer, symbol, position)
+            except Exception as e:
+                self.logger.error("Failed to analyze %s: %s", symbol, e)
+                continue
+            result['move_percent'] = round(move, 4)
+            result['pnl_change'] = self.pnl_changes.get(symbol.upper())
+            analyzer.record_result(result)
+            self.reference_prices[symbol.upper()] = position.current_price
+            results.append(result)
+        if queue:
+            self.logger.info("%d movers deferred to the next cycle (cap %s)", len(queue), self.max_analyses)
+        return results
+
+    def diff(self, positions):
+        """(symbol, move %, position) for positions whose price moved past the threshold since last analyzed.
+
+        Also records each symbol's P&L change since the previous cycle.
+        """
+        movers = []
+        for position in positions:
+            symbol = position.symbol.upper()
+            price = position.current_price
+            pnl = position.pnl
+            previous_pnl = self.last_pnl.get(symbol)
+            self.last_pnl[symbol] = pnl
+            if pnl is not None and previous_pnl is not None:
+                self.pnl_changes[symbol] = float(pnl - previous_pnl)
+            reference = self.reference_prices.get(symbol)
+            if price is None:
+                continue
+            if not reference:
+                # First sighting sets the baseline
+                self.reference_prices[symbol] = price
+                continue
+            move = float(price / reference - 1) * 100.0
+            if abs(move) >= self.threshold:
+                movers.append((position.symbol, move, position))
+        return movers
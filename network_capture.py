@@ -0,0 +1,170 @@
+import base64
+import json
+import os
+import re
+from urllib.parse import parse_qs, urlparse
+from config import (BROWSER, NETWORK_CAPTURE, HOLDINGS_API_PATTERN, CHART_API_PATTERN,
+                    HOLDINGS_API_FIELDS, CANDLE_API_FIELDS)
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Keys under which APIs commonly nest the record list
+CONTAINER_KEYS = ('data', 'result', 'results', 'holdings', 'candles', 'items')
+
+
+def find_records(payload):
+    """Return the first list of records in a JSON payload, searching common container keys."""
+    if isinstance(payload, list):
+        return payload
+    if isinstance(payload, dict):
+        for key in CONTAINER_KEYS:
+            if key in payload:
+                records = find_records(payload[key])
+                if records is not None:
+                    return records
+    return None
+
+
+def _pick(record, candidates):
+    for key in candidates:
+        if key in record and record[key] is not None:
+            return record[key]
+    return None
+
+
+def parse_positions(payload):
+    """Map a holdings API payload to position dicts shaped like the DOM scrape."""
+    positions = []
+    for record in find_records(payload) or []:
+        if not isinstance(record, dict):
+            continue
+        position = {field: _pick(record, keys) for field, keys in HOLDINGS_API_FIELDS.items()}
+        if position['symbol'] is None:
+            continue
+        positions.append({field: '' if value is None else str(value) for field, value in position.items()})
+    return positions
+
+
+def parse_candles(payload):
+    """Map a chart API payload to candle dicts; accepts keyed records or [t, o, h, l, c, v] rows."""
+    candles = []
+    for record in find_records(payload) or []:
+        if isinstance(record, (list, tuple)) and len(record) >= 5:
+            # Array rows follow the field order of CANDLE_API_FIELDS
+            values = dict(zip(CANDLE_API_FIELDS, record))
+        elif isinstance(record, dict):
+            values = {field: _pick(record, keys) for field, keys in CANDLE_API_FIELDS.items()}
+        else:
+            continue
+        try:
+            candles.append({
+                'timestamp': values['timestamp'],
+                'open': float(values['open']),
+                'high': float(values['high']),
+                'low': float(values['low']),
+                'close': float(values['close']),
+                'volume': float(values.get('volume') or 0)
+            })
+        except (KeyError, TypeError, ValueError):
+            continue
+    return candles
+
+
+def fixture_name(url):
+    """Relative file a response is recorded under: its URL path, plus the `symbol` query value if any."""
+    parsed = urlparse(url)
+    name = parsed.path.strip('/') or 'index'
+    symbol = parse_qs(parsed.query).get('symbol')
+    if symbol:
+        name = f"{name}/{symbol[0]}"
+    return f"{name}.json"
+
+
+def capture_for(driver):
+    """A NetworkCapture for `driver` when capture is enabled and supported, else None."""
+    if NETWORK_CAPTURE and BROWSER.lower() == 'chrome':
+        return NetworkCapture(driver)
+    return None
+
+
+class NetworkCapture:
+    """Reads JSON responses the web app fetched, from Chrome's performance log."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.logger = logger
+        self._pending = {}
+        self._finished = []
+        self._bodies = {}
+
+    def mark(self):
+        """Only consider responses that finish after this point (e.g. before opening a new chart).
+
+        Earlier responses can no longer be read, so they are dropped along with their bodies.
+        """
+        self.poll()
+        for request_id, _ in self._finished:
+            self._bodies.pop(request_id, None)
+        self._finished = []
+
+    def poll(self):
+        """Drain the performance log and index finished JSON responses."""
+        for entry in self.driver.get_log('performance'):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method')
+            params = message.get('params', {})
+            if method == 'Network.responseReceived':
+                response = params.get('response', {})
+                if 'json' in response.get('mimeType', ''):
+                    self._pending[params['requestId']] = response.get('url', '')
+            elif method == 'Network.loadingFinished' and params.get('requestId') in self._pending:
+                request_id = params['requestId']
+                self._finished.append((request_id, self._pending.pop(request_id)))
+
+    def latest_json(self, pattern):
+        """Body of the newest finished response since the mark whose URL matches `pattern`, or None."""
+        self.poll()
+        for request_id, url in reversed(self._finished):
+            if re.search(pattern, url):
+                return self._body(request_id, url)
+        return None
+
+    def positions(self):
+        """Positions from the captured holdings response; empty when none was captured."""
+        payload = self.latest_json(HOLDINGS_API_PATTERN)
+        return parse_positions(payload) if payload is not None else []
+
+    def candles(self):
+        """Candles from the newest captured chart response since the mark."""
+        payload = self.latest_json(CHART_API_PATTERN)
+        return parse_candles(payload) if payload is not None else []
+
+    def save(self, directory):
+        """Write every captured body under `directory` by URL path, in the layout stub_server replays."""
+        for url, body in self._bodies.values():
+            target = os.path.join(directory, fixture_name(url))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'w') as f:
+                json.dump(body, f)
+        self.logger.info("Saved %d captured responses to %s", len(self._bodies), directory)
+
+    def _body(self, request_id, url):
+        if request_id not in self._bodies:
+            try:
+                result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            except Exception as e:
+                self.logger.warning("Could not read captured response from %s: %s", url, e)
+                return None
+            body = result.get('body', '')
+            if result.get('base64Encoded'):
+                body = base64.b64decode(body).decode('utf-8')
+            try:
+                self._bodies[request_id] = (url, json.loads(body))
+            except ValueError:
+                self.logger.warning("Captured response from %s is not valid JSON", url)
+                return None
+        return self._bodies[request_id][1]
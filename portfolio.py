@@ -1,79 +1,151 @@
+import logging
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time
-from config import EXPLICIT_WAIT, KOTAK_PORTFOLIO_URL
-from logger import get_logger
+from selenium.common.exceptions import TimeoutException
+import config
+from config import NETWORK_CAPTURE_TIMEOUT
+from logger import get_logger, log_rows
+from profiler import profiler
+from positions import Position, PositionBook
+from locators import HOLDING_ROW_CLASS, ROW_ATTRIBUTE, RowIndex
+from waits import WaitEngine, dom_stable
 
 logger = get_logger(__name__)
 
+# Field class names inside each holding row, keyed by the position field they fill
+HOLDING_FIELDS = {
+    'symbol': 'symbol',
+    'quantity': 'quantity',
+    'current_price': 'current-price',
+    'pnl': 'pnl'
+}
+
+# Reads every holding row in one round trip, stamping each row with its index for RowIndex.
+# A row whose field is missing comes back as null for that field so it can be retried through
+# the per-row path.
+HOLDINGS_EXTRACT_SCRIPT = """
+var fields = arguments[0];
+var rows = document.getElementsByClassName(arguments[1]);
+var out = [];
+for (var i = 0; i < rows.length; i++) {
+    rows[i].setAttribute(arguments[2], i);
+    var record = {};
+    for (var key in fields) {
+        var el = rows[i].getElementsByClassName(fields[key])[0];
+        record[key] = el ? el.innerText.trim() : null;
+    }
+    out.push(record);
+}
+return out;
+"""
+
 class PortfolioAnalyzer:
-    def __init__(self, driver):
+    def __init__(self, driver, capture=None, recorder=None):
         self.driver = driver
+        self.capture = capture
+        self.recorder = recorder
         self.logger = logger
+        self.waits = WaitEngine(driver)
         self.positions = []
+        self.book = PositionBook()
+        self.row_index = RowIndex(HOLDING_FIELDS['symbol'])
     
+    @profiler.timed('portfolio.navigate_to_portfolio')
     def navigate_to_portfolio(self):
         """Navigate to portfolio holdings page."""
         try:
             self.logger.info("Navigating to portfolio page")
-            self.driver.get(KOTAK_PORTFOLIO_URL)
-            time.sleep(2)
+            if self.capture:
+                self.capture.mark()
+            self.driver.get(config.KOTAK_PORTFOLIO_URL)
             
-            WebDriverWait(self.driver, EXPLICIT_WAIT).until(
-                EC.presence_of_element_located((By.CLASS_NAME, 'holdings'))
-            )
+            self.waits.until(EC.presence_of_element_located((By.CLASS_NAME, 'holdings')), 'holdings')
+            self.waits.until(dom_stable(), 'holdings DOM stable')
             
             self.logger.info("Successfully navigated to portfolio")
             return True
         except Exception as e:
-            self.logger.error(f"Failed to navigate to portfolio: {str(e)}")
+            self.logger.error("Failed to navigate to portfolio: %s", e)
             raise
     
+    def return_to_holdings(self):
+        """Reload the holdings page and re-index its rows, e.g. before retrying a chart."""
+        self.navigate_to_portfolio()
+        self.row_index.refresh(self.driver)
+
+    @profiler.timed('portfolio.get_stock_positions')
     def get_stock_positions(self):
         """Extract all stock positions from portfolio."""
         try:
             self.logger.info("Fetching stock positions")
             
+            # Prefer the holdings JSON the page fetched; fall back to scraping the table
+            if self.capture:
+                records = self._captured_positions()
+                if records:
+                    self.logger.info("Found %d positions in captured holdings response", len(records))
+                    return self.load_positions(records)
+                self.logger.info("No captured holdings response, reading the holdings table")
+            
             # Wait for holdings table to load
-            WebDriverWait(self.driver, EXPLICIT_WAIT).until(
-                EC.presence_of_all_elements_located((By.CLASS_NAME, 'holding-row'))
-            )
+            self.waits.until(EC.presence_of_all_elements_located((By.CLASS_NAME, HOLDING_ROW_CLASS)), 'holding rows')
             
-            # Find all stock rows
-            stock_rows = self.driver.find_elements(By.CLASS_NAME, 'holding-row')
-            self.logger.info(f"Found {len(stock_rows)} positions")
+            # Read the whole table in a single script call; the same pass indexes the rows for open_chart
+            records = self.driver.execute_script(HOLDINGS_EXTRACT_SCRIPT, HOLDING_FIELDS, HOLDING_ROW_CLASS,
+                                                 ROW_ATTRIBUTE) or []
+            self.row_index.update([record.get('symbol') for record in records])
+            self.logger.info("Found %d positions", len(records))
             
             positions = []
-            for row in stock_rows:
-                try:
-                    # Extract stock details (adjust selectors based on actual HTML structure)
-                    symbol = row.find_element(By.CLASS_NAME, 'symbol').text
-                    quantity = row.find_element(By.CLASS_NAME, 'quantity').text
-                    current_price = row.find_element(By.CLASS_NAME, 'current-price').text
-                    pnl = row.find_element(By.CLASS_NAME, 'pnl').text
-                    
-                    position = {
-                        'symbol': symbol,
-                        'quantity': quantity,
-                        'current_price': current_price,
-                        'pnl': pnl
-                    }
-                    positions.append(position)
-                    self.logger.info(f"Stock: {symbol}, Qty: {quantity}, Price: {current_price}, P&L: {pnl}")
-                except Exception as e:
-                    self.logger.warning(f"Could not extract data from row: {str(e)}")
+            malformed = []
+            for index, record in enumerate(records):
+                if any(record.get(field) is None for field in HOLDING_FIELDS):
+                    malformed.append(index)
+                    positions.append(None)
                     continue
+                positions.append(record)
+            
+            # Retry only the malformed rows through individual element lookups
+            if malformed:
+                self.logger.info("Re-reading %d malformed rows individually", len(malformed))
+                stock_rows = self.driver.find_elements(By.CLASS_NAME, HOLDING_ROW_CLASS)
+                for index in malformed:
+                    if index < len(stock_rows):
+                        positions[index] = self._extract_row(stock_rows[index])
             
-            self.positions = positions
-            return positions
+            return self.load_positions([position for position in positions if position])
         except Exception as e:
-            self.logger.error(f"Failed to fetch stock positions: {str(e)}")
+            self.logger.error("Failed to fetch stock positions: %s", e)
             raise
     
+    def load_positions(self, records):
+        """Parse raw records into typed positions and index them by symbol; needs no browser."""
+        if self.recorder:
+            self.recorder.holdings(records)
+        positions = [Position.from_record(record) for record in records]
+        log_rows(self.logger, logging.INFO, "Stock: %s, Qty: %s, Price: %s, P&L: %s", zip(positions, records),
+                 lambda row: (row[0].symbol, row[0].quantity, row[0].current_price, row[1]['pnl']))
+        self.positions = positions
+        self.book = PositionBook(positions)
+        return positions
+    
+    def _captured_positions(self):
+        """Positions from the captured holdings response, waiting briefly for it to finish."""
+        try:
+            return self.waits.until(lambda driver: self.capture.positions(), 'captured holdings',
+                                    timeout=NETWORK_CAPTURE_TIMEOUT)
+        except TimeoutException:
+            return []
+    
+    def _extract_row(self, row):
+        """Extract one position through per-field element lookups; None if the row is malformed."""
+        try:
+            return {field: row.find_element(By.CLASS_NAME, class_name).text
+                    for field, class_name in HOLDING_FIELDS.items()}
+        except Exception as e:
+            self.logger.warning("Could not extract data from row: %s", e)
+            return None
+    
     def get_position_by_symbol(self, symbol):
-        """Get a specific position by stock symbol."""
-        for position in self.positions:
-            if position['symbol'].upper() == symbol.upper():
-                return position
-        return None
+        """Get a specific position by stock symbol (case-insensitive)."""
+        return self.book.get(symbol)
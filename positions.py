@@ -0,0 +1,180 @@
+import re
+from decimal import Decimal, InvalidOperation
+import numpy as np
+
+NUMBER_PATTERN = re.compile(r'[-+]?\d+(?:\.\d+)?')
+
+
+def parse_decimal(text):
+    """Parse a display string such as '₹2,345.60', '(1,200)', '−3.4%' or '+5.2%' to a Decimal, or None."""
+    if text is None:
+        return None
+    if isinstance(text, Decimal):
+        return text
+    if isinstance(text, (int, float)):
+        return Decimal(str(text))
+    cleaned = str(text).replace(',', '').replace('\u2212', '-').strip()
+    match = NUMBER_PATTERN.search(cleaned)
+    if not match:
+        return None
+    try:
+        value = Decimal(match.group())
+    except InvalidOperation:
+        return None
+    # A minus or an accounting-style '(' anywhere before the digits, e.g. '-₹1,200.00', '− ₹3.40', '(1,200)'
+    prefix = cleaned[:match.start()]
+    if '-' in prefix or '(' in prefix:
+        value = -abs(value)
+    return value
+
+
+def parse_number(text):
+    """Like parse_decimal, as a float."""
+    value = parse_decimal(text)
+    return None if value is None else float(value)
+
+
+class Position:
+    """One holding with parsed numeric fields; `pnl` is a percentage when `pnl_is_percent` is set."""
+    __slots__ = ('symbol', 'quantity', 'current_price', 'pnl', 'pnl_is_percent')
+
+    def __init__(self, symbol, quantity=None, current_price=None, pnl=None, pnl_is_percent=False):
+        self.symbol = symbol
+        self.quantity = quantity
+        self.current_price = current_price
+        self.pnl = pnl
+        self.pnl_is_percent = pnl_is_percent
+
+    @classmethod
+    def from_record(cls, record):
+        """Build a position from display strings keyed symbol/quantity/current_price/pnl."""
+        pnl_text = str(record.get('pnl') or '')
+        return cls(
+            symbol=str(record['symbol']).strip(),
+            quantity=parse_decimal(record.get('quantity')),
+            current_price=parse_decimal(record.get('current_price')),
+            pnl=parse_decimal(pnl_text),
+            pnl_is_percent=pnl_text.strip().endswith('%')
+        )
+
+    @property
+    def market_value(self):
+        if self.quantity is None or self.current_price is None:
+            return None
+        return self.quantity * self.current_price
+
+    @property
+    def pnl_amount(self):
+        """P&L in currency; percentage P&L is converted against the implied cost basis, as in PortfolioFrame."""
+        if self.pnl is None or not self.pnl_is_percent:
+            return self.pnl
+        value = self.market_value
+        if value is None or self.pnl == -100:
+            return None
+        return value - value / (1 + self.pnl / 100)
+
+    def to_dict(self):
+        """JSON-ready representation."""
+        return {
+            'symbol': self.symbol,
+            'quantity': _json_number(self.quantity),
+            'current_price': _json_number(self.current_price),
+            'pnl': _json_number(self.pnl),
+            'pnl_is_percent': self.pnl_is_percent
+        }
+
+    def __repr__(self):
+        return (f"Position({self.symbol!r}, quantity={self.quantity}, current_price={self.current_price}, "
+                f"pnl={self.pnl}{'%' if self.pnl_is_percent else ''})")
+
+
+def _json_number(value):
+    if value is None:
+        return None
+    return int(value) if value == value.to_integral_value() else float(value)
+
+
+class PositionBook:
+    """Positions in table order with a case-insensitive symbol index."""
+
+    def __init__(self, positions=()):
+        self.positions = list(positions)
+        self._index = {}
+        for position in self.positions:
+            # The first row wins, as the table scan used to
+            self._index.setdefault(position.symbol.upper(), position)
+
+    def get(self, symbol):
+        """Position for `symbol` (any case), or None."""
+        return self._index.get(symbol.upper())
+
+    def frame(self):
+        """Columnar view of the book for aggregates."""
+        return PortfolioFrame(self.positions)
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, item):
+        return self.positions[item]
+
+
+class PortfolioFrame:
+    """Column arrays over a set of positions; aggregates are single vectorized passes."""
+
+    def __init__(self, positions):
+        def column(name):
+            return np.array([np.nan if getattr(p, name) is None else float(getattr(p, name)) for p in positions],
+                            dtype=np.float64)
+
+        self.symbols = np.array([p.symbol.upper() for p in positions], dtype=object)
+        self.quantity = column('quantity')
+        self.price = column('current_price')
+        self.pnl = column('pnl')
+        self.pnl_is_percent = np.array([p.pnl_is_percent for p in positions], dtype=bool)
+
+    @property
+    def market_value(self):
+        return self.quantity * self.price
+
+    @property
+    def pnl_amount(self):
+        """P&L in currency; percentage P&L is converted against the implied cost basis."""
+        value = self.market_value
+        with np.errstate(divide='ignore', invalid='ignore'):
+            from_percent = value - value / (1.0 + self.pnl / 100.0)
+        return np.where(self.pnl_is_percent, from_percent, self.pnl)
+
+    def weights(self):
+        """Each position's share of total market value."""
+        value = self.market_value
+        total = np.nansum(value)
+        return value / total if total else np.full(value.shape, np.nan)
+
+    def totals(self):
+        """Position count, market value and P&L for the whole frame."""
+        value = self.market_value
+        pnl = self.pnl_amount
+        total_value = float(np.nansum(value))
+        total_pnl = float(np.nansum(pnl))
+        cost = total_value - total_pnl
+        return {
+            'positions': int(len(self.symbols)),
+            'market_value': round(total_value, 2),
+            'pnl': round(total_pnl, 2),
+            'pnl_percent': round(total_pnl / cost * 100.0, 4) if cost else None
+        }
+
+    def by_symbol(self):
+        """Quantity, market value and P&L summed per symbol (e.g. across accounts)."""
+        symbols, inverse = np.unique(self.symbols.astype(str), return_inverse=True)
+        sums = {name: np.bincount(inverse, weights=np.nan_to_num(values), minlength=len(symbols))
+                for name, values in (('quantity', self.quantity), ('market_value', self.market_value),
+                                     ('pnl', self.pnl_amount))}
+        return {
+            symbol: {name: round(float(values[i]), 2) for name, values in sums.items()}
+            for i, symbol in enumerate(symbols)
+        }
@@ -0,0 +1,255 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from config import PROFILE_ENABLED, PROFILE_MAX_SPANS, REPORT_DIR
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Upper bounds (ms) of the command latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class CommandStats:
+    """Count, total and latency histogram of one WebDriver command type."""
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed * 1000.0)] += 1
+
+    def percentile(self, fraction):
+        """Bucket upper bound (ms) below which `fraction` of the calls fell."""
+        target = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target and count:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else round(self.max * 1000.0, 1)
+        return None
+
+    def to_dict(self):
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            'count': self.count,
+            'total_s': round(self.total, 4),
+            'mean_ms': round(self.total / self.count * 1000.0, 2) if self.count else None,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': round(self.max * 1000.0, 2),
+            'histogram': {label: count for label, count in zip(labels, self.buckets) if count}
+        }
+
+
+class Span:
+    __slots__ = ('name', 'kind', 'parent', 'start', 'duration', 'commands', 'driver_time', 'slept')
+
+    def __init__(self, name, kind, parent, start):
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.start = start
+        self.duration = 0.0
+        self.commands = 0
+        self.driver_time = 0.0
+        self.slept = 0.0
+
+    @property
+    def idle(self):
+        """Time neither in driver commands nor in explicit sleeps; for wait spans this is polling idle."""
+        return max(0.0, self.duration - self.driver_time - self.slept)
+
+
+class Profiler:
+    """Per-run spans, WebDriver command statistics and sleep-versus-work accounting.
+
+    Driver commands and sleeps are attributed to every span open on the issuing thread, so a step's
+    counts include its nested steps.
+    """
+
+    def __init__(self, enabled=PROFILE_ENABLED, max_spans=PROFILE_MAX_SPANS):
+        self.enabled = enabled
+        self.max_spans = max_spans
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """Start a new run."""
+        with self._lock:
+            self.started_at = datetime.now().isoformat()
+            self._origin = time.perf_counter()
+            self.commands = {}
+            self.steps = {}
+            self.spans = []
+            self.dropped_spans = 0
+            self.slept = 0.0
+            self.wait_idle = 0.0
+
+    def instrument(self, driver):
+        """Time every command the driver sends (elements send theirs through the driver too)."""
+        if not self.enabled or getattr(driver, '_profiled', False):
+            return driver
+        original = driver.execute
+
+        def execute(driver_command, params=None):
+            start = time.perf_counter()
+            try:
+                return original(driver_command, params)
+            finally:
+                self._command(driver_command, time.perf_counter() - start)
+
+        driver.execute = execute
+        driver._profiled = True
+        return driver
+
+    @contextmanager
+    def span(self, name, kind='step'):
+        """Time a block as a span nested under the thread's open spans."""
+        if not self.enabled:
+            yield None
+            return
+        stack = self._stack()
+        span = Span(name, kind, stack[-1].name if stack else None, time.perf_counter())
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            stack.pop()
+            span.duration = time.perf_counter() - span.start
+            self._close(span)
+
+    def timed(self, name=None):
+        """Decorator running the function inside a span (named after the function by default)."""
+        def decorator(func):
+            label = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.span(label):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def sleep(self, seconds):
+        """time.sleep, counted as idle time."""
+        if seconds <= 0:
+            return
+        start = time.perf_counter()
+        time.sleep(seconds)
+        if not self.enabled:
+            return
+        elapsed = time.perf_counter() - start
+        for span in self._stack():
+            span.slept += elapsed
+        with self._lock:
+            self.slept += elapsed
+
+    def profile(self):
+        """Machine-readable profile of the run so far."""
+        with self._lock:
+            wall = time.perf_counter() - self._origin
+            driver_time = sum(stats.total for stats in self.commands.values())
+            idle = self.slept + self.wait_idle
+            return {
+                'started_at': self.started_at,
+                'wall_s': round(wall, 3),
+                'time': {
+                    'driver_commands_s': round(driver_time, 3),
+                    'sleeping_s': round(self.slept, 3),
+                    'wait_polling_idle_s': round(self.wait_idle, 3),
+                    'working_s': round(max(0.0, wall - idle), 3)
+                },
+                'commands': {command: stats.to_dict() for command, stats in sorted(self.commands.items())},
+                'steps': {name: {key: round(value, 4) if isinstance(value, float) else value
+                                 for key, value in step.items()}
+                          for name, step in sorted(self.steps.items())},
+                'spans': list(self.spans),
+                'dropped_spans': self.dropped_spans
+            }
+
+    def export(self, path=None):
+        """Write the profile as JSON; returns the path."""
+        path = path or os.path.join(REPORT_DIR, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, 'w') as f:
+            json.dump(self.profile(), f, indent=2)
+        self.logger.info("Profile saved to %s", path)
+        return path
+
+    def print_summary(self):
+        """Print where the run's time went."""
+        profile = self.profile()
+        print("\n" + "=" * 60)
+        print("RUN PROFILE")
+        print("=" * 60)
+        print(f"Wall time: {profile['wall_s']:.2f}s")
+        for label, value in profile['time'].items():
+            print(f"  {label}: {value:.2f}")
+        print("\nSteps (calls, total s, driver commands):")
+        for name, step in sorted(profile['steps'].items(), key=lambda item: -item[1]['total_s']):
+            print(f"  {name}: {step['calls']}, {step['total_s']:.2f}s, {step['commands']}")
+        print("\nDriver commands (count, mean ms, p95 ms):")
+        for command, stats in sorted(profile['commands'].items(), key=lambda item: -item[1]['total_s']):
+            print(f"  {command}: {stats['count']}, {stats['mean_ms']}, {stats['p95_ms']}")
+        print("=" * 60)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _command(self, command, elapsed):
+        for span in self._stack():
+            span.commands += 1
+            span.driver_time += elapsed
+        with self._lock:
+            stats = self.commands.get(command)
+            if stats is None:
+                stats = self.commands[command] = CommandStats()
+            stats.add(elapsed)
+
+    def _close(self, span):
+        with self._lock:
+            step = self.steps.setdefault(span.name, {'kind': span.kind, 'calls': 0, 'total_s': 0.0, 'max_s': 0.0,
+                                                     'commands': 0, 'driver_s': 0.0, 'slept_s': 0.0})
+            step['calls'] += 1
+            step['total_s'] += span.duration
+            step['max_s'] = max(step['max_s'], span.duration)
+            step['commands'] += span.commands
+            step['driver_s'] += span.driver_time
+            step['slept_s'] += span.slept
+            if span.kind == 'wait':
+                self.wait_idle += span.idle
+            if len(self.spans) >= self.max_spans:
+                self.dropped_spans += 1
+                return
+            self.spans.append({
+                'name': span.name,
+                'kind': span.kind,
+                'parent': span.parent,
+                'thread': threading.current_thread().name,
+                'start_s': round(span.start - self._origin, 4),
+                'duration_s': round(span.duration, 4),
+                'commands': span.commands,
+                'driver_s': round(span.driver_time, 4)
+            })
+
+
+profiler = Profiler()
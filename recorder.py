@@ -0,0 +1,130 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from config import RECORDINGS_DIR, RECORDING_CACHE_OBJECTS
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Readout fields stored per chart snapshot; the capture time goes in the session manifest instead,
+# so identical readouts taken at different times are stored once
+SNAPSHOT_VALUE_FIELDS = ('current_price', 'price_change', 'open', 'high', 'low', 'close', 'candle_class')
+
+
+class SnapshotStore:
+    """Content-addressed, gzip-compressed JSON objects; identical snapshots are stored once across runs."""
+
+    def __init__(self, root=RECORDINGS_DIR, cache_objects=RECORDING_CACHE_OBJECTS):
+        self.root = root
+        self.cache_objects = cache_objects
+        self.logger = logger
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], f"{digest[2:]}.json.gz")
+
+    def put(self, payload):
+        """Store `payload` unless an identical one already is; returns its digest."""
+        data = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str).encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest):
+        """The payload stored under `digest`; recently read objects are kept decoded in memory."""
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return self._cache[digest]
+        with gzip.open(self.path(digest), 'rb') as f:
+            payload = json.loads(f.read())
+        with self._lock:
+            self._cache[digest] = payload
+            while len(self._cache) > self.cache_objects:
+                self._cache.popitem(last=False)
+        return payload
+
+
+class SessionRecorder:
+    """Records what the analyzers read during a live run (holdings records, candles, chart readouts).
+
+    Each run appends one event per line to `sessions/session_YYYYMMDD_HHMMSS.ndjson` under the root,
+    referring to the snapshots in the shared SnapshotStore.
+    """
+
+    def __init__(self, root=RECORDINGS_DIR):
+        self.store = SnapshotStore(root)
+        self.path = os.path.join(root, 'sessions', f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson")
+        self.count = 0
+        self.logger = logger
+        self._file = None
+        self._lock = threading.Lock()
+
+    def holdings(self, records):
+        self._record(lambda: {'kind': 'holdings', 'records': self.store.put(records)})
+
+    def chart(self, symbol, timeframe, candles=None, snapshots=None, stored=None):
+        """One chart state: the captured candles (with the stored history analyzed alongside them, if any),
+        or the readout snapshots it was sampled into."""
+        def build():
+            event = {'kind': 'chart', 'symbol': symbol, 'timeframe': timeframe}
+            if candles:
+                event['candles'] = self.store.put(candles)
+            if stored is not None:
+                event['stored'] = self.store.put(stored)
+            if snapshots is not None:
+                values = [{name: getattr(snapshot, name) for name in SNAPSHOT_VALUE_FIELDS}
+                          for snapshot in snapshots]
+                event['snapshots'] = self.store.put(values)
+                event['captured_at'] = [snapshot.captured_at for snapshot in snapshots]
+            return event
+        self._record(build)
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+                self.logger.info("Recorded %s snapshots to %s", self.count, self.path)
+
+    def _record(self, build):
+        try:
+            event = build()
+            event['at'] = time.time()
+            line = json.dumps(event, separators=(',', ':'))
+            with self._lock:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    self._file = open(self.path, 'a')
+                self._file.write(line + '\n')
+                self._file.flush()
+                self.count += 1
+        except (OSError, TypeError, ValueError) as e:
+            # A recording problem must never fail the live run
+            self.logger.warning("Could not record a snapshot: %s", e)
+
+
+def read_session(path):
+    """Events of a recorded session, skipping lines a crash cut short."""
+    events = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping unreadable line %d of %s", number, path)
+    return events
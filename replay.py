@@ -0,0 +1,103 @@
+"""Re-run the portfolio and chart analysis over recorded sessions, without a browser.
+
+Sessions are recorded by `python main.py --record` (or RECORD_ENABLED in config.py).
+
+Usage: python replay.py [--root recordings] [--since 2026-09-01] [--session PATH ...] [--out replay.ndjson]
+"""
+import argparse
+import glob
+import os
+import time
+from datetime import datetime
+from config import RECORDINGS_DIR, REPORT_DIR
+from chart_analyzer import ChartAnalyzer, ChartSnapshot
+from portfolio import PortfolioAnalyzer
+from recorder import SnapshotStore, read_session
+from report_writer import ReportWriter
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def session_paths(root=RECORDINGS_DIR, since=None):
+    """Recorded session manifests under `root`, oldest first; `since` is a date as YYYY-MM-DD."""
+    paths = sorted(glob.glob(os.path.join(root, 'sessions', 'session_*.ndjson')))
+    if since:
+        cutoff = since.replace('-', '')
+        paths = [path for path in paths if os.path.basename(path)[len('session_'):] >= cutoff]
+    return paths
+
+
+class ReplayBackend:
+    """Feeds recorded snapshots to PortfolioAnalyzer and ChartAnalyzer in place of a browser."""
+
+    def __init__(self, root=RECORDINGS_DIR):
+        self.store = SnapshotStore(root)
+        self.portfolio_analyzer = PortfolioAnalyzer(None)
+        self.chart_analyzer = ChartAnalyzer(None)
+        self.logger = logger
+
+    def replay(self, path):
+        """One result per recorded chart state of the session at `path`, in recorded order."""
+        session = os.path.basename(path)
+        results = []
+        for event in read_session(path):
+            try:
+                if event['kind'] == 'holdings':
+                    self.portfolio_analyzer.load_positions(self.store.get(event['records']))
+                elif event['kind'] == 'chart':
+                    results.append(self.replay_chart(event, session))
+            except (OSError, KeyError, ValueError) as e:
+                self.logger.warning("Skipping %s event in %s: %s", event.get('kind'), session, e)
+        return results
+
+    def replay_chart(self, event, session):
+        chart = self.chart_analyzer
+        chart.symbol = event['symbol']
+        chart.timeframe = event['timeframe']
+        if event.get('candles'):
+            stored = self.store.get(event['stored']) if event.get('stored') else None
+            analysis = chart.analyze_candles(self.store.get(event['candles']), stored)
+        else:
+            values = self.store.get(event['snapshots']) if event.get('snapshots') else []
+            analysis = chart.analyze_snapshots([ChartSnapshot.from_values(captured_at, value) for captured_at, value
+                                                in zip(event.get('captured_at', []), values)])
+        position = self.portfolio_analyzer.get_position_by_symbol(event['symbol'])
+        return {
+            'symbol': event['symbol'],
+            'timeframe': event['timeframe'],
+            'position': position.to_dict() if position else None,
+            'analysis': analysis,
+            'session': session,
+            'timestamp': datetime.fromtimestamp(event['at']).isoformat()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-analyze recorded sessions without a browser')
+    parser.add_argument('--root', default=RECORDINGS_DIR, help='recordings directory')
+    parser.add_argument('--since', help='only sessions recorded on or after this date (YYYY-MM-DD)')
+    parser.add_argument('--session', action='append', help='replay only this session manifest (repeatable)')
+    parser.add_argument('--out', help='report path (default: replay_report_YYYYMMDD_HHMMSS.ndjson in REPORT_DIR)')
+    args = parser.parse_args()
+
+    paths = args.session or session_paths(args.root, args.since)
+    if not paths:
+        print(f"No recorded sessions under {args.root}")
+        return
+    backend = ReplayBackend(args.root)
+    report = ReportWriter(args.out or os.path.join(
+        REPORT_DIR, f"replay_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson"), fsync_every=10000)
+    start = time.perf_counter()
+    try:
+        for path in paths:
+            for result in backend.replay(path):
+                report.write(result)
+    finally:
+        report.close()
+    print(f"Replayed {len(paths)} sessions, {report.count} chart analyses in {time.perf_counter() - start:.2f}s "
+          f"-> {report.path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Streaming NDJSON analysis reports, columnar export and multi-run merging.
+
+Usage:
+  python report_writer.py summary analysis_report_20251229_120000.ndjson
+  python report_writer.py export analysis_report_20251229_120000.ndjson [out.npz]
+  python report_writer.py merge reports.db analysis_report_*.ndjson
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+import numpy as np
+from config import REPORT_DIR, REPORT_FSYNC_EVERY
+from positions import Position, parse_decimal, parse_number
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ReportWriter:
+    """Appends each result as one JSON line as soon as it is produced."""
+
+    def __init__(self, path=None, fsync_every=REPORT_FSYNC_EVERY):
+        self.path = path or os.path.join(
+            REPORT_DIR, f"analysis_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson"
+        )
+        self.fsync_every = fsync_every
+        self.logger = logger
+        self.count = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if self._file.tell() and not _ends_with_newline(self.path):
+            # Resuming after a crash mid-line: terminate it so the next record starts clean
+            self._file.write('\n')
+
+    def write(self, result):
+        """Append one result; it is on disk (fsynced) at least every `fsync_every` records."""
+        line = json.dumps(result, default=str, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            self.count += 1
+            if self.count % self.fsync_every == 0:
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+def read_records(path):
+    """Yield results from an NDJSON report (a line cut off by a crash is skipped) or a legacy JSON report."""
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            yield from json.load(f).get('results', [])
+        return
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning("Skipping unreadable line %s in %s", number, path)
+
+
+def summarize(path):
+    """Counts per trend and the symbols analyzed, built by streaming the report."""
+    trends = Counter()
+    symbols = []
+    for record in read_records(path):
+        symbols.append(record['symbol'])
+        trends[(record.get('analysis') or {}).get('trend') or 'N/A'] += 1
+    return {
+        'report': path,
+        'total_symbols_analyzed': len(symbols),
+        'symbols': symbols,
+        'trends': dict(trends)
+    }
+
+
+def _flat(record):
+    """Scalar columns of one result; `pnl` is always a currency amount, whatever unit the holdings page used."""
+    analysis = record.get('analysis') or {}
+    position = record.get('position') or {}
+    pnl = position.get('pnl')
+    holding = Position(record.get('symbol'), quantity=parse_decimal(position.get('quantity')),
+                       current_price=parse_decimal(position.get('current_price')), pnl=parse_decimal(pnl),
+                       pnl_is_percent=bool(position.get('pnl_is_percent')) or str(pnl or '').strip().endswith('%'))
+    return {
+        'symbol': record.get('symbol'),
+        'timestamp': record.get('timestamp'),
+        'trend': analysis.get('trend'),
+        'current_price': parse_number(analysis.get('current_price')),
+        'quantity': parse_number(position.get('quantity')),
+        'position_price': parse_number(position.get('current_price')),
+        'pnl': parse_number(holding.pnl_amount),
+        'waited': sum(wait.get('waited', 0) for wait in record.get('waits') or [])
+    }
+
+
+TEXT_COLUMNS = ('symbol', 'timestamp', 'trend')
+NUMBER_COLUMNS = ('current_price', 'quantity', 'position_price', 'pnl', 'waited')
+
+
+def export_columnar(path, out_path=None):
+    """Write the report's scalar columns to a compressed .npz (one array per column)."""
+    out_path = out_path or f"{os.path.splitext(path)[0]}.npz"
+    rows = [_flat(record) for record in read_records(path)]
+    columns = {name: np.array([row[name] or '' for row in rows], dtype=str) for name in TEXT_COLUMNS}
+    columns.update({name: np.array([np.nan if row[name] is None else row[name] for row in rows], dtype=np.float64)
+                    for name in NUMBER_COLUMNS})
+    np.savez_compressed(out_path, **columns)
+    logger.info("Exported %d results to %s", len(rows), out_path)
+    return out_path
+
+
+def _row(run, record):
+    flat = _flat(record)
+    return (run, *(flat[name] for name in TEXT_COLUMNS + NUMBER_COLUMNS), json.dumps(record, separators=(',', ':')))
+
+
+def merge_reports(paths, db_path):
+    """Load many run reports into one SQLite table `results`; returns rows added."""
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (run TEXT, symbol TEXT, timestamp TEXT, trend TEXT, "
+            "current_price REAL, quantity REAL, position_price REAL, pnl REAL, waited REAL, record TEXT)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS results_symbol_time ON results (symbol, timestamp)")
+        added = 0
+        for path in paths:
+            # The full path: per-account reports share file names across directories
+            run = os.path.abspath(path)
+            connection.execute("DELETE FROM results WHERE run = ?", (run,))
+            cursor = connection.executemany(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (_row(run, record) for record in read_records(path))
+            )
+            added += cursor.rowcount
+        connection.commit()
+    finally:
+        connection.close()
+    logger.info("Merged %d reports (%s results) into %s", len(paths), added, db_path)
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analysis report tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+    summary_parser = commands.add_parser('summary', help='print a report summary')
+    summary_parser.add_argument('report')
+    export_parser = commands.add_parser('export', help='write a columnar .npz export')
+    export_parser.add_argument('report')
+    export_parser.add_argument('out', nargs='?')
+    merge_parser = commands.add_parser('merge', help='merge run reports into a SQLite database')
+    merge_parser.add_argument('database')
+    merge_parser.add_argument('reports', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'summary':
+        print(json.dumps(summarize(args.report), indent=2))
+    elif args.command == 'export':
+        print(export_columnar(args.report, args.out))
+    else:
+        merge_reports(args.reports, args.database)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from selenium.webdriver.common.by import By
+from config import (SCREENSHOT_DIR, SCREENSHOT_MAX_BYTES, SCREENSHOT_WORKERS, SCREENSHOT_HASH_DISTANCE,
+                    SCREENSHOT_FORMAT)
+from logger import get_logger
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional: without it frames are stored as captured and only exact repeats are skipped
+    Image = None
+
+logger = get_logger(__name__)
+
+
+def difference_hash(png_bytes):
+    """64-bit perceptual (difference) hash of an image, or None without Pillow."""
+    if Image is None:
+        return None
+    with Image.open(io.BytesIO(png_bytes)) as image:
+        pixels = list(image.convert('L').resize((9, 8)).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+class ScreenshotPipeline:
+    """Captures the chart element and encodes, de-duplicates and stores frames on background threads."""
+
+    def __init__(self, directory=SCREENSHOT_DIR, max_bytes=SCREENSHOT_MAX_BYTES, workers=SCREENSHOT_WORKERS,
+                 hash_distance=SCREENSHOT_HASH_DISTANCE, image_format=SCREENSHOT_FORMAT):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hash_distance = hash_distance
+        self.image_format = image_format.lower() if Image is not None else 'png'
+        self.logger = logger
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='screenshot')
+        self._lock = threading.Lock()
+        self._last_frames = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def capture(self, driver, filename, key=None):
+        """Grab the chart container (the full page if it is missing) and queue it; returns the output path.
+
+        Only the grab runs on the caller's thread. A frame near-identical to the previous one for the same
+        `key` is stored as a hard link to that file, so the returned path is always valid.
+        """
+        try:
+            png = driver.find_element(By.CLASS_NAME, 'chart-container').screenshot_as_png
+        except Exception:
+            png = driver.get_screenshot_as_png()
+        base, _ = os.path.splitext(os.path.basename(filename))
+        path = os.path.join(self.directory, f"{base}.{self.image_format}")
+        self._executor.submit(self._store, png, path, key or base)
+        return path
+
+    def close(self):
+        """Wait for queued frames to be written."""
+        self._executor.shutdown(wait=True)
+
+    def _store(self, png, path, key):
+        try:
+            frame_hash = difference_hash(png)
+            exact_hash = hashlib.sha1(png).hexdigest()
+            with self._lock:
+                previous = self._last_frames.get(key)
+            if previous and os.path.exists(previous['path']) and self._is_duplicate(previous, frame_hash, exact_hash):
+                try:
+                    os.link(previous['path'], path)
+                    self.logger.info("Screenshot %s unchanged, linked to %s", path, previous['path'])
+                    return
+                except OSError:
+                    pass  # no hard link support here; store the frame itself
+            data = self._encode(png)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._last_frames[key] = {'path': path, 'hash': frame_hash, 'exact': exact_hash}
+            self.logger.info("Screenshot saved to %s (%d bytes)", path, len(data))
+            self._evict()
+        except Exception as e:
+            self.logger.error("Failed to store screenshot %s: %s", path, e)
+
+    def _is_duplicate(self, previous, frame_hash, exact_hash):
+        if previous['exact'] == exact_hash:
+            return True
+        if frame_hash is None or previous['hash'] is None:
+            return False
+        return bin(frame_hash ^ previous['hash']).count('1') <= self.hash_distance
+
+    def _encode(self, png):
+        if Image is None:
+            return png
+        with Image.open(io.BytesIO(png)) as image:
+            output = io.BytesIO()
+            if self.image_format == 'webp':
+                image.save(output, format='WEBP', quality=80, method=4)
+            else:
+                image.save(output, format='PNG', optimize=True)
+        return output.getvalue()
+
+    def _evict(self):
+        """Delete the oldest frames until the directory fits in max_bytes; hard links count and go together."""
+        with self._lock:
+            frames = {}
+            for name in os.listdir(self.directory):
+                full = os.path.join(self.directory, name)
+                if name.endswith('.tmp') or not os.path.isfile(full):
+                    continue
+                stat = os.stat(full)
+                frame = frames.setdefault(stat.st_ino, {'mtime': stat.st_mtime, 'size': stat.st_size, 'paths': []})
+                frame['paths'].append(full)
+            total = sum(frame['size'] for frame in frames.values())
+            for frame in sorted(frames.values(), key=lambda frame: frame['mtime']):
+                if total <= self.max_bytes:
+                    break
+                for full in frame['paths']:
+                    os.remove(full)
+                    self.logger.info("Evicted screenshot %s", full)
+                total -= frame['size']
@@ -0,0 +1,312 @@
+"""Long-lived analysis service: a warm, logged-in browser answering requests over localhost HTTP.
+
+Usage: python main.py --serve [--port 8766]
+
+    GET /health               queue, cache and request counters
+    GET /positions            holdings and portfolio totals
+    GET /analyze/RELIANCE     chart analysis for one symbol (?fresh=1 skips the result cache)
+"""
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from config import (CHART_WORKERS, SERVICE_HOST, SERVICE_PORT, SERVICE_CACHE_TTL, SERVICE_POSITIONS_TTL,
+                    SERVICE_QUEUE_SIZE, SERVICE_REQUEST_TIMEOUT)
+from chart_pool import ChartWorkerPool
+from session_cache import capture_session
+from logger import get_logger
+from profiler import profiler
+
+logger = get_logger(__name__)
+
+
+class ServiceBusy(Exception):
+    """The request queue is full."""
+
+
+class AnalysisService:
+    """Keeps one session open and runs portfolio and chart analyses as requests arrive.
+
+    Browser work happens on a single dispatcher thread fed by a bounded queue. A request for a symbol
+    that is already queued or running shares that request's result, and results are reused for
+    `cache_ttl` seconds. With `workers` > 1, queued chart requests run side by side in worker browsers.
+    """
+
+    def __init__(self, analyzer, workers=CHART_WORKERS, cache_ttl=SERVICE_CACHE_TTL,
+                 positions_ttl=SERVICE_POSITIONS_TTL, queue_size=SERVICE_QUEUE_SIZE):
+        self.analyzer = analyzer
+        self.workers = max(1, workers)
+        self.cache_ttl = cache_ttl
+        self.positions_ttl = positions_ttl
+        self.logger = logger
+        self.pool = None
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'executed': 0, 'failed': 0}
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._pending = {}  # (kind, symbol) -> Future, while queued or running
+        self._cache = OrderedDict()  # (kind, symbol) -> (expires_at, result), soonest to expire first
+        self._lock = threading.Lock()
+        self._positions_read_at = None
+        self._thread = None
+
+    def start(self):
+        """Log in, read the holdings and start taking requests."""
+        profiler.reset()
+        self.analyzer.start_session()
+        self.analyzer.portfolio_analyzer.get_stock_positions()
+        self._positions_read_at = time.monotonic()
+        if self.workers > 1:
+            self.pool = ChartWorkerPool(capture_session(self.analyzer.login.driver), workers=self.workers,
+                                        store=self.analyzer.candle_store, screenshots=self.analyzer.screenshots,
+                                        recorder=self.analyzer.recorder)
+        self._thread = threading.Thread(target=self._dispatch, name='analysis-service', daemon=True)
+        self._thread.start()
+        self.logger.info("Analysis service ready (%s chart browsers)", self.workers)
+        return self
+
+    def stop(self):
+        """Finish the queued requests, then close the browsers and the report."""
+        analyzer = self.analyzer
+        try:
+            if self._thread:
+                self._queue.put(None)
+                self._thread.join()
+        finally:
+            if self.pool:
+                self.pool.close()
+            analyzer.screenshots.close()
+            if analyzer.report:
+                analyzer.generate_report()
+            analyzer.login.close()
+            if analyzer.recorder:
+                analyzer.recorder.close()
+            analyzer.finish_profile()
+
+    def submit(self, kind, symbol=None, fresh=False):
+        """Future for a 'positions' or 'analysis' result; raises ServiceBusy if the queue is full."""
+        key = (kind, symbol.strip().upper() if symbol else None)
+        with self._lock:
+            self.stats['requests'] += 1
+            cached = self._cache.get(key)
+            if cached and not fresh and cached[0] > time.monotonic():
+                self.stats['cache_hits'] += 1
+                future = Future()
+                future.set_result(cached[1])
+                return future
+            future = self._pending.get(key)
+            if future:
+                self.stats['coalesced'] += 1
+                return future
+            future = Future()
+            try:
+                self._queue.put_nowait((key, future))
+            except queue.Full:
+                raise ServiceBusy(f"{self._queue.maxsize} requests already queued")
+            self._pending[key] = future
+            return future
+
+    def status(self):
+        with self._lock:
+            now = time.monotonic()
+            return dict(self.stats, queued=self._queue.qsize(), pending=len(self._pending),
+                        cached=sum(1 for expires_at, _ in self._cache.values() if expires_at > now))
+
+    def _dispatch(self):
+        while True:
+            batch = [self._queue.get()]
+            # With worker browsers, take whatever else is queued so those charts run side by side
+            while self.pool and len(batch) < self.workers:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            batch = [item for item in batch if item is not None]
+            if batch:
+                self._execute(batch)
+            if stop:
+                return
+
+    def _execute(self, batch):
+        """Run one batch; every future in it is resolved, whatever fails, and the dispatcher keeps going."""
+        error = None
+        try:
+            self._run_batch(batch)
+        except Exception as e:
+            self.logger.error("Request batch failed: %s", e)
+            error = e
+        for key, future in batch:
+            if not future.done():
+                self._finish(key, future, error=error or RuntimeError(f"Request {key[0]} {key[1] or ''} was not run"))
+
+    def _run_batch(self, batch):
+        charts = []
+        for key, future in batch:
+            kind, symbol = key
+            try:
+                if kind == 'positions':
+                    self._finish(key, future, self._positions_result())
+                else:
+                    charts.append((key, future, self._position(symbol)))
+            except Exception as e:
+                self._finish(key, future, error=e)
+        if self.pool and len(charts) > 1:
+            self._analyze_in_pool(charts)
+            return
+        for key, future, position in charts:
+            try:
+                result = self.analyzer.analyze_with_retry(self.analyzer.chart_analyzer, position.symbol, position)
+            except Exception as e:
+                self._finish(key, future, error=e)
+                self._recover()
+                continue
+            self._finish(key, future, result)
+            try:
+                self.analyzer.record_result(result)
+            except Exception as e:
+                self.logger.error("Could not record the %s result: %s", position.symbol, e)
+
+    def _analyze_in_pool(self, charts):
+        jobs = [(position.symbol, position) for _, _, position in charts]
+        results = self.pool.map(self.analyzer.analyze_with_retry, jobs, on_result=self.analyzer.record_result)
+        for (key, future, position), result in zip(charts, results):
+            if result is None:
+                self._finish(key, future, error=RuntimeError(f"Analysis of {position.symbol} failed"))
+            else:
+                self._finish(key, future, result)
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            self._pending.pop(key, None)
+            if error is None:
+                self.stats['executed'] += 1
+                now = time.monotonic()
+                # Every entry lives cache_ttl, so the expired ones are at the front
+                while self._cache and next(iter(self._cache.values()))[0] <= now:
+                    self._cache.popitem(last=False)
+                self._cache.pop(key, None)
+                self._cache[key] = (now + self.cache_ttl, result)
+            else:
+                self.stats['failed'] += 1
+        if error is None:
+            future.set_result(result)
+        else:
+            self.logger.error("Request %s %s failed: %s", key[0], key[1] or '', error)
+            future.set_exception(error)
+
+    def _read_positions(self):
+        portfolio = self.analyzer.portfolio_analyzer
+        portfolio.navigate_to_portfolio()
+        portfolio.get_stock_positions()
+        self._positions_read_at = time.monotonic()
+        return portfolio.book
+
+    def _positions_result(self):
+        book = self._read_positions()
+        return {
+            'positions': [position.to_dict() for position in self.analyzer.portfolio_analyzer.positions],
+            'totals': book.frame().totals(),
+            'timestamp': datetime.now().isoformat()
+        }
+
+    def _position(self, symbol):
+        """The holding for `symbol`, re-reading the holdings page if they are stale or it is missing."""
+        book = self.analyzer.portfolio_analyzer.book
+        fresh = time.monotonic() - self._positions_read_at <= self.positions_ttl
+        position = book.get(symbol) if fresh else None
+        if position is None:
+            position = self._read_positions().get(symbol)
+        if position is None:
+            raise LookupError(f"{symbol} is not in the portfolio")
+        return position
+
+    def _recover(self):
+        """Back to the holdings page after a failed analysis; a new session if the browser is unusable."""
+        try:
+            self._read_positions()
+        except Exception as e:
+            self.logger.warning("Holdings page unreachable, starting a new session: %s", e)
+            try:
+                self.analyzer.restart_session()
+                self._read_positions()
+            except Exception as e:
+                self.logger.error("Could not restart the session: %s", e)
+
+
+class ServiceServer:
+    """Localhost HTTP front end for an AnalysisService; every response is JSON."""
+
+    def __init__(self, service, host=SERVICE_HOST, port=SERVICE_PORT, timeout=SERVICE_REQUEST_TIMEOUT):
+        self.service = service
+        self.timeout = timeout
+        self.logger = logger
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                parts = [unquote(part) for part in url.path.split('/') if part]
+                fresh = parse_qs(url.query).get('fresh', ['0'])[0].lower() in ('1', 'true', 'yes')
+                try:
+                    if parts == ['health']:
+                        self._send(200, server.service.status())
+                    elif parts == ['positions']:
+                        self._wait(server.service.submit('positions', fresh=fresh))
+                    elif len(parts) == 2 and parts[0] == 'analyze':
+                        self._wait(server.service.submit('analysis', parts[1], fresh=fresh))
+                    else:
+                        self._send(404, {'error': f"Unknown path {url.path}"})
+                except ServiceBusy as e:
+                    self._send(503, {'error': str(e)})
+
+            def _wait(self, future):
+                try:
+                    self._send(200, future.result(timeout=server.timeout))
+                except FutureTimeout:
+                    self._send(504, {'error': f"No result within {server.timeout}s; the request is still running"})
+                except LookupError as e:
+                    self._send(404, {'error': str(e)})
+                except Exception as e:
+                    self._send(500, {'error': str(e)})
+
+            def _send(self, status, payload):
+                body = json.dumps(payload, default=str).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                server.logger.debug(format, *args)
+
+        return Handler
+
+
+def serve(analyzer, host=SERVICE_HOST, port=SERVICE_PORT):
+    """Run the service until interrupted."""
+    service = AnalysisService(analyzer)
+    try:
+        service.start()
+        server = ServiceServer(service, host, port)
+        logger.info("Serving analyses at %s (Ctrl+C to stop)", server.base_url)
+        try:
+            server.httpd.serve_forever()
+        finally:
+            server.httpd.server_close()
+    except KeyboardInterrupt:
+        logger.info("Service stopped")
+    finally:
+        service.stop()
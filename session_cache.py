@@ -0,0 +1,80 @@
+import json
+import os
+import time
+from config import SESSION_CACHE_FILE, SESSION_CACHE_TTL
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+LOCAL_STORAGE_READ_SCRIPT = "return Object.assign({}, window.localStorage);"
+LOCAL_STORAGE_WRITE_SCRIPT = """
+var items = arguments[0];
+for (var key in items) { window.localStorage.setItem(key, items[key]); }
+"""
+
+
+def capture_session(driver):
+    """Snapshot the authenticated state (cookies and local storage) of the current origin."""
+    return {
+        'saved_at': time.time(),
+        'cookies': driver.get_cookies(),
+        'local_storage': driver.execute_script(LOCAL_STORAGE_READ_SCRIPT) or {}
+    }
+
+
+def apply_session(driver, state, url):
+    """Load `url` (same origin as the captured session) and install the captured cookies and local storage."""
+    driver.get(url)
+    now = time.time()
+    for cookie in state.get('cookies', []):
+        if cookie.get('expiry') and cookie['expiry'] < now:
+            continue
+        driver.add_cookie(cookie)
+    if state.get('local_storage'):
+        driver.execute_script(LOCAL_STORAGE_WRITE_SCRIPT, state['local_storage'])
+
+
+class SessionCache:
+    def __init__(self, path=SESSION_CACHE_FILE, ttl=SESSION_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.logger = logger
+
+    def save(self, driver):
+        """Persist the driver's session; the file is written atomically and readable only by the owner."""
+        try:
+            state = capture_session(driver)
+            tmp_path = f"{self.path}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+            self.logger.info("Session cached to %s", self.path)
+            return True
+        except Exception as e:
+            self.logger.warning("Could not cache session: %s", e)
+            return False
+
+    def load(self):
+        """Return the cached session state, or None when it is missing, unreadable or expired."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning("Ignoring unreadable session cache: %s", e)
+            return None
+        age = time.time() - state.get('saved_at', 0)
+        if age > self.ttl:
+            self.logger.info("Cached session expired (%.0fs old)", age)
+            self.clear()
+            return None
+        return state
+
+    def clear(self):
+        """Remove the cached session."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,108 @@
+"""Local HTTP server that replays recorded responses for offline runs.
+
+Usage: python stub_server.py fixtures/replay --port 8765 [--latency-ms 50]
+
+A request is served from the first file that exists under the root:
+the URL path itself, the path with `.html` appended, or the recorded
+JSON response named by `network_capture.fixture_name` (the layout
+`NetworkCapture.save` writes).
+"""
+import argparse
+import mimetypes
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from network_capture import fixture_name
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class StubServer:
+    def __init__(self, root, host='127.0.0.1', port=0, latency=0.0):
+        self.root = os.path.abspath(root)
+        self.latency = latency
+        self.logger = logger
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        self.logger.info("Stub server replaying %s at %s", self.root, self.base_url)
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def resolve(self, request_path):
+        """File under the root that answers `request_path`, or None."""
+        path = request_path.split('?', 1)[0].lstrip('/')
+        for candidate in (path, f"{path}.html", fixture_name(request_path)):
+            full = os.path.abspath(os.path.join(self.root, candidate))
+            if full.startswith(self.root + os.sep) and os.path.isfile(full):
+                return full
+        return None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                full = server.resolve(self.path)
+                if not full:
+                    self.send_error(404)
+                    return
+                with open(full, 'rb') as f:
+                    body = f.read()
+                self.send_response(200)
+                self.send_header('Content-Type', mimetypes.guess_type(full)[0] or 'application/octet-stream')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                server.logger.debug(format, *args)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded responses over HTTP')
+    parser.add_argument('root', help='directory of recorded responses and pages')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='delay added to every response')
+    args = parser.parse_args()
+
+    server = StubServer(args.root, args.host, args.port, args.latency_ms / 1000)
+    print(f"Serving {server.root} at {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+from decimal import Decimal
+from positions import Position, parse_decimal
+
+
+def test_parse_decimal_keeps_sign_around_currency_symbol():
+    assert parse_decimal('-₹1,200.00') == Decimal('-1200.00')
+    assert parse_decimal('₹-1,200') == Decimal('-1200')
+    assert parse_decimal('(1,200)') == Decimal('-1200')
+    assert parse_decimal('−3.4%') == Decimal('-3.4')
+    assert parse_decimal('− ₹3.40') == Decimal('-3.40')
+    assert parse_decimal('+5.2%') == Decimal('5.2')
+    assert parse_decimal('₹2,345.60') == Decimal('2345.60')
+
+
+def test_pnl_amount_converts_percentage_against_cost_basis():
+    percent = Position.from_record({'symbol': 'A', 'quantity': '10', 'current_price': '₹110', 'pnl': '+10%'})
+    amount = Position.from_record({'symbol': 'A', 'quantity': '10', 'current_price': '110', 'pnl': '-250.50'})
+    assert percent.pnl_amount == Decimal('100')
+    assert amount.pnl_amount == Decimal('-250.50')
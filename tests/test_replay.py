@@ -0,0 +1,37 @@
+from candle_store import CandleStore
+from chart_analyzer import ChartAnalyzer
+from recorder import SessionRecorder
+from replay import ReplayBackend
+
+
+class CapturedCandles:
+    """Stands in for NetworkCapture: the chart response holds `candles`."""
+
+    def __init__(self, candles):
+        self._candles = candles
+
+    def candles(self):
+        return self._candles
+
+
+def _candles(start, count):
+    return [{'timestamp': 3600 * (start + i), 'open': 100.0 + i, 'high': 102.0 + i + (i % 3),
+             'low': 99.0 + i - (i % 2), 'close': 101.0 + i + (i % 4) * 0.5, 'volume': 1000.0 + 10 * i}
+            for i in range(count)]
+
+
+def test_replayed_analysis_equals_live_analysis_with_candle_store(tmp_path):
+    store = CandleStore(str(tmp_path / 'candles'))
+    # Bars stored by earlier runs, which this run's capture does not include
+    store.append('TCS', '1H', _candles(0, 60))
+    recorder = SessionRecorder(str(tmp_path / 'recordings'))
+    chart = ChartAnalyzer(None, capture=CapturedCandles(_candles(58, 5)), store=store, recorder=recorder)
+    chart.symbol, chart.timeframe = 'TCS', '1H'
+    live = chart.analyze_current_movement()
+    recorder.close()
+
+    replayed = ReplayBackend(str(tmp_path / 'recordings')).replay(recorder.path)
+    assert len(replayed) == 1
+    assert replayed[0]['analysis'] == live
+    # The indicators ran over the stored history, not just the five captured bars
+    assert live['indicators'] != ChartAnalyzer(None).analyze_candles(_candles(58, 5))['indicators']
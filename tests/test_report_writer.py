@@ -0,0 +1,24 @@
+import json
+import sqlite3
+from report_writer import merge_reports
+
+
+def _report(path, symbol):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({'symbol': symbol, 'timestamp': '2026-01-01T10:00:00', 'analysis': {'trend': 'UP'},
+                                'position': {'quantity': 1, 'current_price': 100}}) + '\n')
+    return str(path)
+
+
+def test_merge_keeps_same_named_reports_from_different_directories(tmp_path):
+    first = _report(tmp_path / 'a' / 'analysis_report_20260101_100000.ndjson', 'TCS')
+    second = _report(tmp_path / 'b' / 'analysis_report_20260101_100000.ndjson', 'INFY')
+    database = str(tmp_path / 'reports.db')
+    merge_reports([first, second], database)
+    merge_reports([first], database)
+    connection = sqlite3.connect(database)
+    try:
+        symbols = sorted(row[0] for row in connection.execute("SELECT symbol FROM results"))
+    finally:
+        connection.close()
+    assert symbols == ['INFY', 'TCS']
@@ -0,0 +1,150 @@
+import time
+from selenium.webdriver.support.ui import WebDriverWait
+from config import EXPLICIT_WAIT, WAIT_POLL_INTERVAL, DOM_STABLE_PERIOD, CHART_SELECTORS
+from locators import PICK_JS
+from logger import get_logger
+from profiler import profiler
+
+logger = get_logger(__name__)
+
+# Readiness conditions. Each returns a callable usable with WebDriverWait.until,
+# evaluated in a single script call so implicit waits never stall a poll.
+
+CHART_RENDERED_SCRIPT = """
+var c = document.getElementsByClassName('chart-container')[0];
+if (!c) { return false; }
+var el = c.querySelector('canvas, svg');
+if (!el) { return false; }
+var r = el.getBoundingClientRect();
+return r.width > 0 && r.height > 0;
+"""
+
+# Attribute set on the chart drawn before a timeframe switch, so the redraw can be told apart from it
+STALE_CHART_ATTRIBUTE = 'data-kotak-stale'
+
+CHART_RERENDERED_SCRIPT = """
+var c = document.getElementsByClassName('chart-container')[0];
+if (!c) { return false; }
+var stale = arguments[0], before = arguments[1];
+var el = c.querySelector('canvas:not([' + stale + ']), svg:not([' + stale + '])');
+if (!el) {
+    // Charts that redraw into the same canvas: the readout changing marks the new frame
+    el = c.querySelector('canvas, svg');
+    if (!el || c.innerText === before) { return false; }
+}
+var r = el.getBoundingClientRect();
+return r.width > 0 && r.height > 0;
+"""
+
+CHART_CLOSED_SCRIPT = """
+var c = document.getElementsByClassName('chart-container')[0];
+if (!c) { return true; }
+var r = c.getBoundingClientRect();
+return r.width === 0 || r.height === 0;
+"""
+
+OHLC_POPULATED_SCRIPT = PICK_JS + """
+var v = pick(arguments[0])[1];
+if (v.length < 4) { return false; }
+for (var i = 0; i < 4; i++) {
+    if (!v[i].textContent.trim()) { return false; }
+}
+return true;
+"""
+
+
+def dom_stable(quiet_period=DOM_STABLE_PERIOD):
+    """Condition: document has loaded and its element count is unchanged for `quiet_period` seconds."""
+    state = {'count': None, 'since': None}
+
+    def _condition(driver):
+        ready_state, count = driver.execute_script(
+            "return [document.readyState, document.getElementsByTagName('*').length];"
+        )
+        now = time.monotonic()
+        if ready_state == 'loading' or count != state['count']:
+            state['count'], state['since'] = count, now
+            return False
+        return now - state['since'] >= quiet_period
+
+    return _condition
+
+
+def chart_rendered():
+    """Condition: the chart container holds a canvas/svg with a non-zero size."""
+    return lambda driver: driver.execute_script(CHART_RENDERED_SCRIPT)
+
+
+def chart_rerendered(readout_before):
+    """Condition: the chart has drawn a new frame since its elements were stamped stale.
+
+    `readout_before` is the chart container's text at that point, for charts that reuse their canvas.
+    """
+    return lambda driver: driver.execute_script(CHART_RERENDERED_SCRIPT, STALE_CHART_ATTRIBUTE, readout_before)
+
+
+def chart_closed():
+    """Condition: the chart container is gone or has no size."""
+    return lambda driver: driver.execute_script(CHART_CLOSED_SCRIPT)
+
+
+def ohlc_populated(candidates=None):
+    """Condition: all four OHLC values carry text; `candidates` as from SelectorRegistry.candidates('ohlc')."""
+    candidates = candidates or [[index, selector] for index, selector in enumerate(CHART_SELECTORS['ohlc'])]
+    return lambda driver: driver.execute_script(OHLC_POPULATED_SCRIPT, candidates)
+
+
+class WaitEngine:
+    def __init__(self, driver, timeout=EXPLICIT_WAIT, poll_interval=WAIT_POLL_INTERVAL):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.logger = logger
+        self.timings = []
+
+    def until(self, condition, step, timeout=None):
+        """Poll `condition` until it is truthy and record how long the step waited."""
+        start = time.monotonic()
+        try:
+            with profiler.span(f"wait:{step}", kind='wait'):
+                return WebDriverWait(
+                    self.driver,
+                    timeout if timeout is not None else self.timeout,
+                    poll_frequency=self.poll_interval
+                ).until(condition)
+        finally:
+            self._record(step, time.monotonic() - start)
+
+    def observe(self, sample, samples, interval, max_duration, step, first_timeout=None):
+        """Collect `samples` non-empty readings from `sample()`, ending early once enough are taken.
+
+        Until the first reading arrives the wait is bounded by `first_timeout` (the engine's timeout by
+        default); only the sampling window after it runs up to `max_duration`.
+        """
+        readings = []
+        start = time.monotonic()
+        first_timeout = self.timeout if first_timeout is None else first_timeout
+        with profiler.span(f"wait:{step}", kind='wait'):
+            while True:
+                reading = sample()
+                if reading is not None:
+                    readings.append(reading)
+                if len(readings) >= samples:
+                    break
+                limit = max_duration if readings else min(first_timeout, max_duration)
+                remaining = start + limit - time.monotonic()
+                if remaining <= 0:
+                    self.logger.warning("%s: only %d/%s samples within %ss", step, len(readings), samples, limit)
+                    break
+                profiler.sleep(min(interval, remaining))
+        self._record(step, time.monotonic() - start)
+        return readings
+
+    def drain(self):
+        """Return the recorded step timings and start a fresh list."""
+        timings, self.timings = self.timings, []
+        return timings
+
+    def _record(self, step, elapsed):
+        self.timings.append({'step': step, 'waited': round(elapsed, 3)})
+        self.logger.info("Waited %.2fs for %s", elapsed, step)